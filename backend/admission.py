@@ -0,0 +1,177 @@
+import os
+import time
+import uuid
+import sqlite3
+import tempfile
+from typing import NamedTuple
+
+from fastapi import Depends, HTTPException, status
+
+from security import get_current_user_email
+
+# --- Configuration ---
+# The admission state lives in a local SQLite file so every uvicorn worker on the host shares it.
+ADMISSION_DB_PATH = os.environ.get(
+    "ADMISSION_DB_PATH", os.path.join(tempfile.gettempdir(), "ai_job_tools_admission.db")
+)
+# Maximum weighted LLM work in flight across all users before new requests are shed.
+LLM_QUEUE_LIMIT = int(os.environ.get("LLM_QUEUE_LIMIT", 40))
+# In-flight entries older than this are assumed to belong to a crashed worker and are ignored.
+LEASE_SECONDS = int(os.environ.get("ADMISSION_LEASE_SECONDS", 300))
+RATE_WINDOW_SECONDS = 60
+
+
+class EndpointLimit(NamedTuple):
+    concurrent: int   # requests one user may have in flight at once
+    per_minute: int   # requests one user may start per minute
+    cost: int         # weight of one request against LLM_QUEUE_LIMIT (roughly, LLM calls made)
+    retry_after: int  # seconds to suggest when the endpoint is busy
+
+
+ENDPOINT_LIMITS = {
+    "generate": EndpointLimit(concurrent=2, per_minute=10, cost=1, retry_after=5),
+    "generate-batch": EndpointLimit(concurrent=1, per_minute=3, cost=4, retry_after=20),
+    "generate-bio": EndpointLimit(concurrent=2, per_minute=10, cost=1, retry_after=5),
+    "parse-resume": EndpointLimit(concurrent=1, per_minute=5, cost=1, retry_after=5),
+    "valuate-cv": EndpointLimit(concurrent=1, per_minute=10, cost=1, retry_after=5),
+    "interview-questions": EndpointLimit(concurrent=1, per_minute=10, cost=1, retry_after=5),
+    "interview-answer": EndpointLimit(concurrent=2, per_minute=20, cost=1, retry_after=3),
+    "match-jobs": EndpointLimit(concurrent=1, per_minute=3, cost=10, retry_after=20),
+}
+
+
+class AdmissionController:
+    """
+    Per-user concurrency and rate limits plus a global cap on LLM work, backed by SQLite.
+    Every check-and-reserve runs in one IMMEDIATE transaction, so it is atomic across processes.
+    """
+
+    def __init__(self, db_path: str, queue_limit: int, lease_seconds: int = LEASE_SECONDS):
+        self.db_path = db_path
+        self.queue_limit = queue_limit
+        self.lease_seconds = lease_seconds
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS inflight ("
+                "token TEXT PRIMARY KEY, user TEXT NOT NULL, endpoint TEXT NOT NULL, "
+                "cost INTEGER NOT NULL, started_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS recent_requests ("
+                "user TEXT NOT NULL, endpoint TEXT NOT NULL, ts REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_inflight_user ON inflight (user, endpoint)")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_recent_user ON recent_requests (user, endpoint, ts)")
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        # isolation_level=None lets us issue BEGIN IMMEDIATE ourselves.
+        return sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+
+    def acquire(self, user: str, endpoint: str, limit: EndpointLimit) -> str:
+        """
+        Reserves a slot for the request or raises an HTTPException:
+        429 when the user is over their own limits, 503 when the global LLM queue is saturated.
+        Returns a token to pass to `release`.
+        """
+        now = time.time()
+        token = uuid.uuid4().hex
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM inflight WHERE started_at < ?", (now - self.lease_seconds,))
+            conn.execute("DELETE FROM recent_requests WHERE ts < ?", (now - RATE_WINDOW_SECONDS,))
+
+            (user_inflight,) = conn.execute(
+                "SELECT COUNT(*) FROM inflight WHERE user = ? AND endpoint = ?", (user, endpoint)
+            ).fetchone()
+            if user_inflight >= limit.concurrent:
+                raise _reject(
+                    status.HTTP_429_TOO_MANY_REQUESTS,
+                    "You already have a request of this kind running. Please wait for it to finish.",
+                    limit.retry_after,
+                )
+
+            count, oldest = conn.execute(
+                "SELECT COUNT(*), MIN(ts) FROM recent_requests WHERE user = ? AND endpoint = ?",
+                (user, endpoint),
+            ).fetchone()
+            if count >= limit.per_minute:
+                raise _reject(
+                    status.HTTP_429_TOO_MANY_REQUESTS,
+                    "Too many requests. Please slow down.",
+                    oldest + RATE_WINDOW_SECONDS - now,
+                )
+
+            (queue_depth,) = conn.execute("SELECT COALESCE(SUM(cost), 0) FROM inflight").fetchone()
+            if queue_depth + limit.cost > self.queue_limit:
+                raise _reject(
+                    status.HTTP_503_SERVICE_UNAVAILABLE,
+                    "The AI service is busy right now. Please try again shortly.",
+                    limit.retry_after,
+                )
+
+            conn.execute(
+                "INSERT INTO inflight (token, user, endpoint, cost, started_at) VALUES (?, ?, ?, ?, ?)",
+                (token, user, endpoint, limit.cost, now),
+            )
+            conn.execute(
+                "INSERT INTO recent_requests (user, endpoint, ts) VALUES (?, ?, ?)", (user, endpoint, now)
+            )
+            conn.execute("COMMIT")
+            return token
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def release(self, token: str):
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM inflight WHERE token = ?", (token,))
+        finally:
+            conn.close()
+
+
+def _reject(status_code: int, detail: str, retry_after: float) -> HTTPException:
+    return HTTPException(
+        status_code=status_code,
+        detail=detail,
+        headers={"Retry-After": str(max(1, int(retry_after + 0.999)))},
+    )
+
+
+# Built by the app's lifespan handler (or on first use): opening the SQLite file and running
+# its DDL does not belong in an import.
+admission_controller = None
+
+
+def get_admission_controller() -> AdmissionController:
+    global admission_controller
+    if admission_controller is None:
+        admission_controller = AdmissionController(ADMISSION_DB_PATH, LLM_QUEUE_LIMIT)
+    return admission_controller
+
+
+def admit(endpoint: str):
+    """
+    Builds a dependency that admits a request to `endpoint` under its ENDPOINT_LIMITS entry
+    and frees the slot once the response has been produced.
+    Usage: @app.post(..., dependencies=[Depends(admit("generate"))])
+    """
+    limit = ENDPOINT_LIMITS[endpoint]
+
+    def admission_dependency(current_user_email: str = Depends(get_current_user_email)):
+        controller = get_admission_controller()
+        token = controller.acquire(current_user_email, endpoint, limit)
+        try:
+            yield
+        finally:
+            controller.release(token)
+
+    return admission_dependency
@@ -0,0 +1,138 @@
+"""
+Jobs-table growth benchmark.
+
+Fills a scratch `jobs_benchmark` table (same shape as `jobs`) to increasing sizes and reports the
+median latency of the feed/match query, `ORDER BY posted_at DESC LIMIT 50`, with and without the
+posted_at index, next to the number of rows worker/retention.py would leave in the hot table.
+
+Run from the backend directory. By default it uses a throwaway SQLite file; pass --database-url
+to measure a scratch Postgres database (never the production one, the table is dropped at the end):
+    python benchmarks/jobs_table_benchmark.py [--sizes 10000 100000 1000000] [--output jobs_results.jsonl]
+"""
+import os
+import json
+import time
+import uuid
+import random
+import argparse
+import tempfile
+import statistics
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import (
+    create_engine, MetaData, Table, Column, String, BigInteger, Text, DateTime, Index, select, insert, func,
+)
+
+FEED_LIMIT = 50
+INSERT_CHUNK = 20000
+SAMPLE_TEXT = (
+    "We are hiring a Python developer with Django and PostgreSQL experience. "
+    "Remote, full time. Send your CV to jobs@example.com. Deadline in two weeks. "
+) * 4
+
+metadata = MetaData()
+jobs_benchmark = Table(
+    "jobs_benchmark", metadata,
+    Column("id", String(36), primary_key=True),
+    Column("message_id", BigInteger, nullable=False, unique=True),
+    Column("channel_name", String, nullable=False),
+    Column("message_text", Text, nullable=False),
+    Column("posted_at", DateTime(timezone=True), nullable=False),
+    Column("created_at", DateTime(timezone=True), nullable=False),
+)
+posted_at_index = Index("ix_jobs_benchmark_posted_at", jobs_benchmark.c.posted_at)
+
+
+def fill_to(engine, current: int, target: int, span_days: int, now: datetime):
+    """Inserts rows until the table holds `target` of them, posted uniformly over `span_days`."""
+    with engine.begin() as connection:
+        for start in range(current, target, INSERT_CHUNK):
+            connection.execute(insert(jobs_benchmark), [
+                {
+                    "id": str(uuid.uuid4()),
+                    "message_id": message_id,
+                    "channel_name": "freelance_ethio",
+                    "message_text": SAMPLE_TEXT,
+                    "posted_at": now - timedelta(seconds=random.uniform(0, span_days * 86400)),
+                    "created_at": now,
+                }
+                for message_id in range(start, min(start + INSERT_CHUNK, target))
+            ])
+
+
+def feed_query_ms(engine, repeat: int) -> float:
+    statement = select(jobs_benchmark).order_by(jobs_benchmark.c.posted_at.desc()).limit(FEED_LIMIT)
+    timings = []
+    with engine.connect() as connection:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            connection.execute(statement).all()
+            timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="scratch database to use (default: temporary SQLite file)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--span-days", type=int, default=730, help="age range of the generated posts")
+    parser.add_argument("--retention-days", type=int, default=int(os.environ.get("JOB_RETENTION_DAYS", 30)))
+    parser.add_argument("--repeat", type=int, default=20, help="query repetitions; the median is reported")
+    parser.add_argument("--output", help="append each result as one JSON line to this file")
+    args = parser.parse_args()
+
+    scratch_file = None
+    database_url = args.database_url
+    if not database_url:
+        scratch_file = os.path.join(tempfile.mkdtemp(), "jobs_benchmark.db")
+        database_url = f"sqlite:///{scratch_file}"
+    engine = create_engine(database_url)
+    metadata.drop_all(engine)
+    jobs_benchmark.create(engine)
+    posted_at_index.drop(engine)  # the index is added only while measuring, so fills stay fast
+
+    now = datetime.now(timezone.utc)
+    cutoff = now - timedelta(days=args.retention_days)
+    rows = 0
+    results = []
+    print(f"{'rows':>10} {'no index (ms)':>14} {'index (ms)':>11} {'hot rows':>10}")
+    try:
+        for size in sorted(args.sizes):
+            fill_to(engine, rows, size, args.span_days, now)
+            rows = size
+
+            without_index = feed_query_ms(engine, args.repeat)
+            posted_at_index.create(engine)
+            with_index = feed_query_ms(engine, args.repeat)
+            posted_at_index.drop(engine)
+
+            with engine.connect() as connection:
+                hot_rows = connection.execute(
+                    select(func.count()).select_from(jobs_benchmark).where(jobs_benchmark.c.posted_at >= cutoff)
+                ).scalar_one()
+
+            result = {
+                "timestamp": now.isoformat(),
+                "dialect": engine.dialect.name,
+                "rows": size,
+                "feed_query_no_index_ms": round(without_index, 3),
+                "feed_query_index_ms": round(with_index, 3),
+                "hot_rows_after_retention": hot_rows,
+                "retention_days": args.retention_days,
+            }
+            results.append(result)
+            print(f"{size:>10} {without_index:>14.3f} {with_index:>11.3f} {hot_rows:>10}")
+    finally:
+        metadata.drop_all(engine)
+        engine.dispose()
+        if scratch_file:
+            os.remove(scratch_file)
+
+    if args.output:
+        with open(args.output, "a") as f:
+            for result in results:
+                f.write(json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
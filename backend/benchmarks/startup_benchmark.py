@@ -0,0 +1,111 @@
+"""
+Cold-start benchmark for the API.
+
+Reports two numbers we track release over release:
+  - import time of `main`, from `python -X importtime` (plus the slowest modules),
+  - time-to-first-response: from spawning uvicorn to the first 200 from the health check.
+
+Run from the backend directory:
+    python benchmarks/startup_benchmark.py [--runs 5] [--output startup_results.jsonl]
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import statistics
+import subprocess
+import urllib.request
+from datetime import datetime, timezone
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_import_time(top: int):
+    """Imports `main` in a fresh interpreter and returns (total_ms, slowest direct imports of main)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+    )
+    total_us = 0
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 0 and name.strip() == "main":
+            total_us = int(cumulative_us)
+        elif depth == 1:
+            # importtime lists children before their parent, so depth 1 here means "imported by main".
+            modules.append((name.strip(), int(cumulative_us)))
+    modules.sort(key=lambda item: item[1], reverse=True)
+    return total_us / 1000, [(name, us / 1000) for name, us in modules[:top]]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_first_response(timeout: float = 60.0) -> float:
+    """Starts uvicorn and returns milliseconds until GET / first answers 200."""
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}/"
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if server.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {server.returncode}")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return (time.perf_counter() - started) * 1000
+            except OSError:
+                time.sleep(0.01)
+        raise TimeoutError(f"No response from {url} within {timeout}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="repetitions; the median is reported")
+    parser.add_argument("--top", type=int, default=10, help="number of slowest imports to list")
+    parser.add_argument("--output", help="append the result as one JSON line to this file")
+    args = parser.parse_args()
+
+    import_runs, slowest = [], []
+    for _ in range(args.runs):
+        total_ms, slowest = measure_import_time(args.top)
+        import_runs.append(total_ms)
+    first_response_runs = [measure_first_response() for _ in range(args.runs)]
+
+    result = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "import_main_ms": round(statistics.median(import_runs), 1),
+        "time_to_first_response_ms": round(statistics.median(first_response_runs), 1),
+        "slowest_imports_ms": {name: round(ms, 1) for name, ms in slowest},
+    }
+
+    print(f"import main:            {result['import_main_ms']:8.1f} ms (median of {args.runs})")
+    print(f"time to first response: {result['time_to_first_response_ms']:8.1f} ms (median of {args.runs})")
+    print("slowest imports (cumulative, last run):")
+    for name, ms in slowest:
+        print(f"  {name:<30} {ms:8.1f} ms")
+
+    if args.output:
+        with open(args.output, "a") as f:
+            f.write(json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import zlib
+import hashlib
+from typing import Optional
+
+from sqlalchemy import update, delete
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session
+
+from models import ContentBlob
+
+# Content-addressed storage for the large texts saved alongside generated content
+# (the user's CV and the job description). Identical texts are stored once, keyed by
+# their SHA-256, zlib-compressed, and reference counted by the rows that point to them.
+
+COMPRESSION_LEVEL = 6
+
+
+def blob_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def put_blob(session: Session, text: Optional[str], references: int = 1) -> Optional[str]:
+    """
+    Stores `text` (or takes more references to an identical stored text) and returns its hash.
+    `references` is the number of rows that will point to it.
+    Does not commit; the caller commits together with the rows that reference the blob.
+    """
+    if not text:
+        return None
+    key = blob_hash(text)
+    if _add_reference(session, key, references):
+        return key
+
+    try:
+        with session.begin_nested():
+            encoded = text.encode("utf-8")
+            session.add(ContentBlob(
+                hash=key,
+                data=zlib.compress(encoded, COMPRESSION_LEVEL),
+                size=len(encoded),
+                ref_count=references,
+            ))
+    except IntegrityError:
+        # A concurrent request inserted the same text first; reference that one.
+        _add_reference(session, key, references)
+    return key
+
+
+def _add_reference(session: Session, key: str, references: int = 1) -> bool:
+    result = session.exec(
+        update(ContentBlob).where(ContentBlob.hash == key).values(ref_count=ContentBlob.ref_count + references)
+    )
+    return result.rowcount > 0
+
+
+def release_blob(session: Session, key: Optional[str]) -> None:
+    """Drops one reference to a blob, deleting it once nothing points to it. Does not commit."""
+    if not key:
+        return
+    session.exec(update(ContentBlob).where(ContentBlob.hash == key).values(ref_count=ContentBlob.ref_count - 1))
+    session.exec(delete(ContentBlob).where(ContentBlob.hash == key, ContentBlob.ref_count <= 0))
+
+
+def get_blob_text(session: Session, key: Optional[str]) -> Optional[str]:
+    if not key:
+        return None
+    blob = session.get(ContentBlob, key)
+    if blob is None:
+        return None
+    return zlib.decompress(blob.data).decode("utf-8")
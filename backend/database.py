@@ -2,6 +2,7 @@ import os
 from sqlmodel import create_engine, Session
 from dotenv import load_dotenv
 
+# The single place the backend loads its .env file; main.py imports this module first.
 load_dotenv()
 
 DATABASE_URL = os.environ.get("DATABASE_URL")
@@ -9,9 +10,22 @@ DATABASE_URL = os.environ.get("DATABASE_URL")
 if not DATABASE_URL:
     raise ValueError("No DATABASE_URL found in environment variables")
 
-engine = create_engine(DATABASE_URL, echo=False) # Set echo to False for cleaner logs
+# Built by the app's lifespan handler (or on first use) rather than at import time.
+engine = None
+
+def get_engine():
+    global engine
+    if engine is None:
+        engine = create_engine(DATABASE_URL, echo=False) # Set echo to False for cleaner logs
+    return engine
+
+def dispose_engine():
+    global engine
+    if engine is not None:
+        engine.dispose()
+        engine = None
 
 # This is the new part that will be used in our routes
 def get_session():
-    with Session(engine) as session:
-        yield session
\ No newline at end of file
+    with Session(get_engine()) as session:
+        yield session
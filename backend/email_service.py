@@ -1,34 +1,285 @@
 import os
+import time
+import sqlite3
 import smtplib
+import asyncio
+import logging
+import tempfile
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
-from dotenv import load_dotenv
-
-load_dotenv()
 
 SMTP_SERVER = os.environ.get("SMTP_SERVER", "smtp.gmail.com")
 SMTP_PORT = int(os.environ.get("SMTP_PORT", 587))
 SMTP_USERNAME = os.environ.get("SMTP_USERNAME")
 SMTP_PASSWORD = os.environ.get("SMTP_PASSWORD")
+# Set SMTP_STARTTLS=false (and leave the credentials empty) to test against a local debugging server.
+SMTP_STARTTLS = os.environ.get("SMTP_STARTTLS", "true").lower() == "true"
+SMTP_FROM = os.environ.get("SMTP_FROM", SMTP_USERNAME)
+
+# --- Outbound Queue ---
+# Messages are persisted to a local SQLite file so they survive restarts and are shared by all workers.
+EMAIL_QUEUE_PATH = os.environ.get(
+    "EMAIL_QUEUE_PATH", os.path.join(tempfile.gettempdir(), "ai_job_tools_email_queue.db")
+)
+EMAIL_BATCH_SIZE = int(os.environ.get("EMAIL_BATCH_SIZE", 20))
+EMAIL_MAX_ATTEMPTS = int(os.environ.get("EMAIL_MAX_ATTEMPTS", 6))
+EMAIL_POLL_SECONDS = float(os.environ.get("EMAIL_POLL_SECONDS", 2))
+# A connection idle for longer than this is closed; servers drop idle clients anyway.
+SMTP_IDLE_SECONDS = float(os.environ.get("SMTP_IDLE_SECONDS", 60))
+BACKOFF_BASE_SECONDS = 5
+BACKOFF_MAX_SECONDS = 15 * 60
+SMTP_TIMEOUT_SECONDS = 30
+# Lease on claimed messages, renewed before each send. One send is several SMTP round trips
+# (plus a reconnect and login on a dropped connection), each allowed SMTP_TIMEOUT_SECONDS.
+CLAIM_SECONDS = 10 * SMTP_TIMEOUT_SECONDS
+
+
+def email_enabled() -> bool:
+    return bool(SMTP_FROM)
 
-def send_welcome_email(to_email: str):
-    if not all([SMTP_USERNAME, SMTP_PASSWORD]):
-        print("SMTP username/password not configured.")
-        return
 
+def build_welcome_email(to_email: str) -> MIMEMultipart:
     msg = MIMEMultipart('alternative')
     msg['Subject'] = "Welcome to AI Job Tools! "
-    msg['From'] = f"AI Job Tools <{SMTP_USERNAME}>"
+    msg['From'] = f"AI Job Tools <{SMTP_FROM}>"
     msg['To'] = to_email
     html_body = f"<h1>Welcome, {to_email}!</h1><p>You've received 20 free credits to get started.</p>"
     msg.attach(MIMEText(html_body, 'html'))
+    return msg
+
+
+class EmailQueue:
+    """A small persistent outbox. Rows are claimed with a lease so several workers can drain it."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS outbox ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, to_addr TEXT NOT NULL, body TEXT NOT NULL, "
+                "attempts INTEGER NOT NULL DEFAULT 0, next_attempt_at REAL NOT NULL, "
+                "claimed_until REAL NOT NULL DEFAULT 0, failed INTEGER NOT NULL DEFAULT 0, "
+                "last_error TEXT, created_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_outbox_due ON outbox (failed, next_attempt_at)")
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+
+    def put(self, to_addr: str, msg) -> None:
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT INTO outbox (to_addr, body, next_attempt_at, created_at) VALUES (?, ?, ?, ?)",
+                (to_addr, msg.as_string(), now, now),
+            )
+        finally:
+            conn.close()
+
+    def claim_batch(self, limit: int) -> list:
+        """Returns up to `limit` due messages as (id, to_addr, body, attempts) and leases them to the caller."""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(
+                "SELECT id, to_addr, body, attempts FROM outbox "
+                "WHERE failed = 0 AND next_attempt_at <= ? AND claimed_until <= ? "
+                "ORDER BY next_attempt_at LIMIT ?",
+                (now, now, limit),
+            ).fetchall()
+            conn.executemany(
+                "UPDATE outbox SET claimed_until = ? WHERE id = ?",
+                [(now + CLAIM_SECONDS, row[0]) for row in rows],
+            )
+            conn.execute("COMMIT")
+            return rows
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def renew_claim(self, message_ids: list) -> None:
+        """Extends the lease on messages this worker still holds, so no other worker sends them."""
+        conn = self._connect()
+        try:
+            conn.executemany(
+                "UPDATE outbox SET claimed_until = ? WHERE id = ?",
+                [(time.time() + CLAIM_SECONDS, message_id) for message_id in message_ids],
+            )
+        finally:
+            conn.close()
+
+    def release_claim(self, message_ids: list) -> None:
+        conn = self._connect()
+        try:
+            conn.executemany("UPDATE outbox SET claimed_until = 0 WHERE id = ?", [(i,) for i in message_ids])
+        finally:
+            conn.close()
+
+    def mark_sent(self, message_id: int) -> None:
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM outbox WHERE id = ?", (message_id,))
+        finally:
+            conn.close()
+
+    def mark_failed(self, message_id: int, attempts: int, error: str) -> None:
+        """Schedules a retry with exponential backoff, or gives up after EMAIL_MAX_ATTEMPTS."""
+        attempts += 1
+        delay = min(BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), BACKOFF_MAX_SECONDS)
+        conn = self._connect()
+        try:
+            conn.execute(
+                "UPDATE outbox SET attempts = ?, next_attempt_at = ?, claimed_until = 0, "
+                "failed = ?, last_error = ? WHERE id = ?",
+                (attempts, time.time() + delay, int(attempts >= EMAIL_MAX_ATTEMPTS), error, message_id),
+            )
+        finally:
+            conn.close()
+
+
+class EmailDispatcher:
+    """
+    Drains the EmailQueue in the background over one long-lived, authenticated SMTP connection.
+    smtplib is blocking, so each batch is sent in a worker thread.
+    """
+
+    def __init__(self, queue: EmailQueue):
+        self.queue = queue
+        self._smtp = None
+        self._last_used = 0.0
+        self._task = None
+        self._loop = None
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Lets the batch in flight finish its current message, then closes the connection.
+        Cancelling the task instead would not stop the worker thread, which could still be
+        using the SMTP connection while it is being closed.
+        """
+        self._stopping = True
+        self._wakeup.set()
+        if self._task:
+            await self._task
+        await asyncio.to_thread(self._close)
+
+    def notify(self) -> None:
+        """Wakes the worker so a freshly queued message goes out without waiting for the next poll."""
+        # Called from request threads, so hand the wakeup to the event loop.
+        self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            self._wakeup.clear()
+            try:
+                sent = await asyncio.to_thread(self.send_pending)
+            except Exception as e:
+                logging.error(f"Email dispatcher error: {e}", exc_info=True)
+                sent = 0
+            if sent:
+                continue  # keep draining while there is a backlog
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=EMAIL_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    def send_pending(self) -> int:
+        """Sends one batch of due messages. Returns how many were delivered."""
+        batch = self.queue.claim_batch(EMAIL_BATCH_SIZE)
+        if not batch:
+            if self._smtp and time.monotonic() - self._last_used > SMTP_IDLE_SECONDS:
+                self._close()
+            return 0
+
+        sent = 0
+        for position, (message_id, to_addr, body, attempts) in enumerate(batch):
+            if self._stopping:
+                # Shutting down: hand the rest back so the next worker sends them right away.
+                self.queue.release_claim([row[0] for row in batch[position:]])
+                break
+            if position:
+                # The batch can outlast one lease; keep the rest of it claimed.
+                self.queue.renew_claim([row[0] for row in batch[position:]])
+            try:
+                self._send(to_addr, body)
+                self.queue.mark_sent(message_id)
+                sent += 1
+            except Exception as e:
+                logging.warning(f"Sending email {message_id} to {to_addr} failed (attempt {attempts + 1}): {e}")
+                self.queue.mark_failed(message_id, attempts, str(e))
+                self._close()  # the next message gets a fresh connection
+        logging.info(f"Email dispatcher sent {sent}/{len(batch)} message(s).")
+        return sent
+
+    def _send(self, to_addr: str, body: str) -> None:
+        try:
+            self._connection().sendmail(SMTP_FROM, to_addr, body)
+        except smtplib.SMTPServerDisconnected:
+            # The server dropped our pooled connection; retry once on a new one.
+            self._close()
+            self._connection().sendmail(SMTP_FROM, to_addr, body)
+        self._last_used = time.monotonic()
+
+    def _connection(self) -> smtplib.SMTP:
+        if self._smtp is None:
+            server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT, timeout=SMTP_TIMEOUT_SECONDS)
+            try:
+                if SMTP_STARTTLS:
+                    server.starttls()
+                if SMTP_USERNAME and SMTP_PASSWORD:
+                    server.login(SMTP_USERNAME, SMTP_PASSWORD)
+            except Exception:
+                server.close()
+                raise
+            self._smtp = server
+        return self._smtp
+
+    def _close(self) -> None:
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except Exception:
+                self._smtp.close()
+            self._smtp = None
+
+
+email_queue = EmailQueue(EMAIL_QUEUE_PATH)
+email_dispatcher = None
+
+
+def queue_welcome_email(to_email: str) -> None:
+    """Persists the welcome email for the dispatcher. Never talks to the mail server."""
+    if not email_enabled():
+        logging.info("SMTP sender not configured; skipping welcome email.")
+        return
+    email_queue.put(to_email, build_welcome_email(to_email))
+    if email_dispatcher:
+        email_dispatcher.notify()
+
+
+def start_email_dispatcher() -> None:
+    global email_dispatcher
+    if email_enabled() and email_dispatcher is None:
+        email_dispatcher = EmailDispatcher(email_queue)
+        email_dispatcher.start()
+
 
-    try:
-        print("Connecting to smtp.gmail.com...")
-        with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
-            server.starttls()
-            server.login(SMTP_USERNAME, SMTP_PASSWORD)
-            server.sendmail(SMTP_USERNAME, to_email, msg.as_string())
-        print("Email sent successfully.")
-    except Exception as e:
-        print(f"Error sending email: {e}")
\ No newline at end of file
+async def stop_email_dispatcher() -> None:
+    global email_dispatcher
+    if email_dispatcher:
+        await email_dispatcher.stop()
+        email_dispatcher = None
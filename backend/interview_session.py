@@ -0,0 +1,215 @@
+import re
+import json
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
+from fastapi import HTTPException, WebSocket, WebSocketDisconnect
+
+from admission import ENDPOINT_LIMITS, get_admission_controller
+
+# A stateful interview-coach conversation over one WebSocket.
+#
+# Client -> server messages:
+#   {"type": "answer_update", "question_index": i, "text": "..."}   partial speech transcript
+#   {"type": "answer_submit", "question_index": i, "text": "..."}   final answer (text optional; falls back to the last update)
+# Server -> client messages:
+#   {"type": "question_delta", "delta": "..."}                      raw tokens while questions are generated
+#   {"type": "question", "index": i, "text": "..."}                 each question as soon as its line is complete
+#   {"type": "questions_done", "questions": [...]}
+#   {"type": "feedback_delta", "question_index": i, "delta": "..."}
+#   {"type": "feedback", "question_index": i, "feedback": {positive_feedback, constructive_feedback, example_improvement}}
+#   {"type": "error", "detail": "...", "retry_after": seconds | null}
+# If the questions cannot be generated the session ends with QuestionsUnavailable.
+
+MODEL = "llama-3.1-8b-instant"
+IDLE_TIMEOUT_SECONDS = 15 * 60
+# Question/answer exchanges kept in the prompt; older ones are dropped to bound its size.
+MAX_CONTEXT_EXCHANGES = 6
+
+_QUESTION_PREFIX_RE = re.compile(r"^\s*(?:\d+[.)]|[-*•])\s*")
+_FEEDBACK_LABELS = {
+    "positive": "positive_feedback",
+    "improve": "constructive_feedback",
+    "example": "example_improvement",
+}
+_FEEDBACK_LABEL_RE = re.compile(r"^\s*\**\s*(positive|improve|example)\s*\**\s*:\s*\**\s*", re.IGNORECASE | re.MULTILINE)
+
+
+def create_coach_system_prompt(cv_text: str, job_description: str) -> str:
+    return f"""
+    Act as an expert hiring manager and a world-class interview coach. You are running a mock interview
+    for the candidate whose CV is below, for the job described below. Keep the whole conversation in mind:
+    later feedback may refer back to earlier answers.
+
+    ---
+    CV TEXT:
+    {cv_text}
+    ---
+    JOB DESCRIPTION:
+    {job_description}
+    ---
+    """
+
+
+QUESTIONS_INSTRUCTION = (
+    "Generate 5 to 7 highly probable and insightful interview questions for this candidate and job: "
+    "a mix of behavioral, technical and project-specific questions tailored to the skills in both the CV "
+    "and the job description. Output one question per line, numbered '1.', '2.', ... and nothing else."
+)
+
+FEEDBACK_INSTRUCTION = """Give feedback on my answer in exactly this format, one line each:
+Positive: <something encouraging about the answer>
+Improve: <a clear, actionable suggestion for improvement>
+Example: <a short example of how part of the answer could be rephrased>"""
+
+
+class QuestionsUnavailable(Exception):
+    """Raised when the session could not produce its questions, so there is nothing to answer."""
+
+
+def parse_feedback(text: str) -> dict:
+    """Splits 'Positive: / Improve: / Example:' feedback into the keys the frontend renders."""
+    feedback = dict.fromkeys(_FEEDBACK_LABELS.values(), "")
+    parts = _FEEDBACK_LABEL_RE.split(text)
+    for label, body in zip(parts[1::2], parts[2::2]):
+        feedback[_FEEDBACK_LABELS[label.lower()]] = body.strip()
+    if not any(feedback.values()):
+        feedback["constructive_feedback"] = text.strip()
+    return feedback
+
+
+class InterviewCoachSession:
+    def __init__(self, websocket: WebSocket, groq_client, user_email: str, cv_text: str, job_description: str):
+        self.websocket = websocket
+        self.groq_client = groq_client
+        self.user_email = user_email
+        self.system_message = {"role": "system", "content": create_coach_system_prompt(cv_text, job_description)}
+        self.exchanges = []  # [user message, assistant message] pairs after the questions
+        self.questions_message = None
+        self.questions = []
+        self.drafts = {}
+
+    async def send(self, message_type: str, **payload):
+        await self.websocket.send_json({"type": message_type, **payload})
+
+    @asynccontextmanager
+    async def admitted(self, endpoint: str):
+        """Applies the same per-user limits as the HTTP endpoints to each generation in the session."""
+        controller = get_admission_controller()
+        token = await asyncio.to_thread(controller.acquire, self.user_email, endpoint, ENDPOINT_LIMITS[endpoint])
+        try:
+            yield
+        finally:
+            await asyncio.to_thread(controller.release, token)
+
+    def _context(self) -> list:
+        messages = [self.system_message, {"role": "user", "content": QUESTIONS_INSTRUCTION}]
+        if self.questions_message:
+            messages.append(self.questions_message)
+        for pair in self.exchanges[-MAX_CONTEXT_EXCHANGES:]:
+            messages.extend(pair)
+        return messages
+
+    async def _stream(self, messages: list, on_delta, temperature: float) -> str:
+        stream = await self.groq_client.chat.completions.create(
+            messages=messages,
+            model=MODEL,
+            temperature=temperature,
+            max_tokens=1024,
+            stream=True,
+        )
+        text = ""
+        async for chunk in stream:
+            delta = chunk.choices[0].delta.content
+            if delta:
+                text += delta
+                await on_delta(delta)
+        return text
+
+    async def generate_questions(self):
+        buffer = ""
+
+        async def on_delta(delta: str):
+            nonlocal buffer
+            await self.send("question_delta", delta=delta)
+            buffer += delta
+            *complete, buffer = buffer.split("\n")
+            for line in complete:
+                await self._add_question(line)
+
+        async with self.admitted("interview-questions"):
+            text = await self._stream(self._context(), on_delta, temperature=0.4)
+        await self._add_question(buffer)
+        self.questions_message = {"role": "assistant", "content": text}
+        await self.send("questions_done", questions=self.questions)
+
+    async def _add_question(self, line: str):
+        question = _QUESTION_PREFIX_RE.sub("", line).strip()
+        if question:
+            self.questions.append(question)
+            await self.send("question", index=len(self.questions) - 1, text=question)
+
+    async def give_feedback(self, index: int, answer: str):
+        user_message = {
+            "role": "user",
+            "content": f"Question {index + 1}: {self.questions[index]}\nMy answer: {answer}\n\n{FEEDBACK_INSTRUCTION}",
+        }
+
+        async def on_delta(delta: str):
+            await self.send("feedback_delta", question_index=index, delta=delta)
+
+        async with self.admitted("interview-answer"):
+            text = await self._stream(self._context() + [user_message], on_delta, temperature=0.3)
+        self.exchanges.append([user_message, {"role": "assistant", "content": text}])
+        await self.send("feedback", question_index=index, feedback=parse_feedback(text))
+
+    async def handle(self, frame: str):
+        try:
+            message = json.loads(frame)
+        except ValueError:
+            message = None
+        if not isinstance(message, dict):
+            await self.send("error", detail="Messages must be JSON objects.", retry_after=None)
+            return
+
+        index = message.get("question_index")
+        if not isinstance(index, int) or not 0 <= index < len(self.questions):
+            await self.send("error", detail="Unknown question_index.", retry_after=None)
+            return
+
+        if message.get("type") == "answer_update":
+            self.drafts[index] = message.get("text") or ""
+        elif message.get("type") == "answer_submit":
+            answer = (message.get("text") or self.drafts.pop(index, "")).strip()
+            if not answer:
+                await self.send("error", detail="The answer is empty.", retry_after=None)
+                return
+            await self.give_feedback(index, answer)
+        else:
+            await self.send("error", detail="Unknown message type.", retry_after=None)
+
+    async def run(self):
+        if not await self._guarded(self.generate_questions()) or not self.questions:
+            raise QuestionsUnavailable()
+        while True:
+            frame = await asyncio.wait_for(self.websocket.receive_text(), timeout=IDLE_TIMEOUT_SECONDS)
+            await self._guarded(self.handle(frame))
+
+    async def _guarded(self, coroutine) -> bool:
+        """
+        Reports limit rejections and AI failures to the client without ending the session.
+        Returns False if one was reported.
+        """
+        try:
+            await coroutine
+            return True
+        except WebSocketDisconnect:
+            raise
+        except HTTPException as e:
+            retry_after = (e.headers or {}).get("Retry-After")
+            await self.send("error", detail=e.detail, retry_after=int(retry_after) if retry_after else None)
+        except Exception:
+            logging.exception("Interview coach generation failed")
+            await self.send("error", detail="The AI service failed to respond. Please try again.", retry_after=None)
+        return False
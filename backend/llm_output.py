@@ -0,0 +1,230 @@
+import os
+import re
+import json
+import asyncio
+import logging
+import sqlite3
+import tempfile
+import typing
+from collections import Counter, defaultdict
+from typing import Type, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+# Structured output for LLM calls that must return JSON.
+# Replies are validated against a Pydantic model. Common defects (code fences, text around the
+# object, differently spelled keys, numbers as strings, ...) are repaired locally; the model is
+# re-prompted only when a required field is still missing or the reply holds no JSON at all.
+
+T = TypeVar("T", bound=BaseModel)
+
+MAX_REPROMPTS = 1
+
+# Per-schema outcome counters: "valid" (parsed as-is), "repaired", "reprompted", "failed".
+# They live in a local SQLite file so every uvicorn worker and the scraper's background
+# matcher on the host add to the same totals.
+LLM_METRICS_DB_PATH = os.environ.get(
+    "LLM_METRICS_DB_PATH", os.path.join(tempfile.gettempdir(), "ai_job_tools_llm_metrics.db")
+)
+
+
+class OutputMetrics:
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.process_counts = defaultdict(Counter)  # this process only, for worker logs
+        self._initialised = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+        if not self._initialised:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_output_counts ("
+                "schema TEXT NOT NULL, outcome TEXT NOT NULL, count INTEGER NOT NULL, "
+                "PRIMARY KEY (schema, outcome))"
+            )
+            self._initialised = True
+        return conn
+
+    def record(self, schema: str, outcome: str) -> None:
+        self.process_counts[schema][outcome] += 1
+        try:
+            conn = self._connect()
+            try:
+                conn.execute(
+                    "INSERT INTO llm_output_counts (schema, outcome, count) VALUES (?, ?, 1) "
+                    "ON CONFLICT (schema, outcome) DO UPDATE SET count = count + 1",
+                    (schema, outcome),
+                )
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            # Metrics must never fail an AI request.
+            logging.warning(f"Could not record LLM output metric {schema}/{outcome}: {e}")
+
+    def snapshot(self) -> dict:
+        """Host-wide totals as {schema: {outcome: count}}."""
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT schema, outcome, count FROM llm_output_counts").fetchall()
+        finally:
+            conn.close()
+        totals = defaultdict(dict)
+        for schema, outcome, count in rows:
+            totals[schema][outcome] = count
+        return dict(totals)
+
+
+output_metrics = OutputMetrics(LLM_METRICS_DB_PATH)
+
+
+class LLMOutputError(ValueError):
+    """Raised when a reply cannot be turned into the expected model, even after re-prompting."""
+
+
+_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL | re.IGNORECASE)
+_TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+_NUMBER_RE = re.compile(r"-?\d+(?:\.\d+)?")
+
+
+def _extract_json_object(raw: str) -> str:
+    """Returns the first balanced {...} in `raw`, ignoring code fences and surrounding prose."""
+    fenced = _FENCE_RE.search(raw)
+    if fenced:
+        raw = fenced.group(1)
+    start = raw.find("{")
+    if start == -1:
+        raise LLMOutputError("no JSON object in reply")
+
+    depth, in_string, escaped = 0, False, False
+    for i, char in enumerate(raw[start:], start):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                return raw[start:i + 1]
+    # Truncated reply: close whatever is still open and let the parser decide.
+    return raw[start:] + ('"' if in_string else "") + "}" * depth
+
+
+def _normalise_key(key: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", key.lower())
+
+
+def _flatten(item):
+    """Turns {"question": "..."}-style list items into their text."""
+    if isinstance(item, dict):
+        return next((value for value in item.values() if isinstance(value, str)), json.dumps(item))
+    return item
+
+
+def _coerce(value, annotation):
+    """Best-effort conversion of a JSON value to the field's annotated type."""
+    origin = typing.get_origin(annotation)
+    if annotation is int:
+        if isinstance(value, bool):
+            return int(value)
+        if isinstance(value, float):
+            return round(value)
+        if isinstance(value, str):
+            number = _NUMBER_RE.search(value)
+            if number:
+                return round(float(number.group()))
+        return value
+    if annotation is str:
+        if isinstance(value, list):
+            return " ".join(str(item) for item in value)
+        if isinstance(value, (int, float)):
+            return str(value)
+        return value
+    if origin is list:
+        (item_type,) = typing.get_args(annotation) or (str,)
+        if isinstance(value, str):
+            items = [line.strip(" -*•\t") for line in value.splitlines()]
+            value = [item for item in items if item] if len(items) > 1 else [value]
+        if isinstance(value, list):
+            return [_coerce(_flatten(item) if item_type is str else item, item_type) for item in value]
+        return value
+    return value
+
+
+def repair(raw: str, response_model: Type[T]) -> typing.Tuple[T, bool]:
+    """
+    Parses `raw` into `response_model`, repairing what it can.
+    Returns (instance, was_repaired); raises LLMOutputError if the reply is beyond local repair.
+    """
+    try:
+        return response_model.model_validate_json(raw), False
+    except ValidationError:
+        pass
+
+    text = _extract_json_object(raw)
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        try:
+            data = json.loads(_TRAILING_COMMA_RE.sub(r"\1", text))
+        except json.JSONDecodeError as e:
+            raise LLMOutputError(f"invalid JSON: {e}") from e
+    if not isinstance(data, dict):
+        raise LLMOutputError("reply is not a JSON object")
+
+    fields = response_model.model_fields
+    by_normalised_key = {_normalise_key(name): name for name in fields}
+    cleaned = {}
+    for key, value in data.items():
+        name = by_normalised_key.get(_normalise_key(key))
+        if name and value is not None:
+            cleaned[name] = _coerce(value, fields[name].annotation)
+
+    try:
+        return response_model.model_validate(cleaned), True
+    except ValidationError as e:
+        raise LLMOutputError(str(e)) from e
+
+
+def _schema_hint(response_model: Type[BaseModel]) -> str:
+    keys = ", ".join(f'"{name}"' for name in response_model.model_fields)
+    return f"Reply with only a single valid JSON object with these keys: {keys}."
+
+
+async def structured_completion(groq_client, prompt: str, response_model: Type[T], **completion_args) -> T:
+    """
+    Runs a JSON-mode chat completion and returns the reply as `response_model`.
+    Falls back to re-prompting (at most MAX_REPROMPTS times) only when local repair fails.
+    """
+    name = response_model.__name__
+    messages = [{"role": "user", "content": prompt}]
+    for attempt in range(MAX_REPROMPTS + 1):
+        chat_completion = await groq_client.chat.completions.create(
+            messages=messages,
+            response_format={"type": "json_object"},
+            **completion_args,
+        )
+        raw = chat_completion.choices[0].message.content or ""
+        try:
+            result, repaired = repair(raw, response_model)
+        except LLMOutputError as e:
+            logging.warning(f"{name} reply could not be repaired (attempt {attempt + 1}): {e}")
+            messages += [
+                {"role": "assistant", "content": raw},
+                {"role": "user", "content": f"That reply was not usable ({e}). {_schema_hint(response_model)}"},
+            ]
+            continue
+
+        outcome = "reprompted" if attempt else "repaired" if repaired else "valid"
+        await asyncio.to_thread(output_metrics.record, name, outcome)
+        return result
+
+    await asyncio.to_thread(output_metrics.record, name, "failed")
+    raise LLMOutputError(f"{name}: no usable reply after {MAX_REPROMPTS + 1} attempt(s)")
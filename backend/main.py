@@ -1,44 +1,90 @@
 import os
 import logging
+import secrets
 import asyncio
 import json
-from fastapi import FastAPI, HTTPException, Depends, Response, File, UploadFile, BackgroundTasks
-import fitz  # PyMuPDF
-from fpdf import FPDF
+from contextlib import asynccontextmanager
+from datetime import datetime
+from fastapi import FastAPI, HTTPException, Depends, Response, File, UploadFile, Header, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from sqlmodel import Session, select
-from typing import List
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session, select, update
+from typing import List, Optional
 from uuid import UUID
-from database import get_session
+from database import get_engine, dispose_engine, get_session
 from models import (
     User, UserCreate, UserLogin, UserResponse,
-    CoverLetterRequest, BioRequest, ContentUpdate, CvValuationRequest, InterviewQuestionRequest, InterviewAnswerRequest,
-    GeneratedContent, GeneratedContentCreate, GeneratedContentResponse,
-    Job, JobResponse, JobMatchRequest, JobMatchResponse
+    CoverLetterRequest, BatchCoverLetterRequest, BioRequest, ContentUpdate, CvValuationRequest, InterviewQuestionRequest, InterviewAnswerRequest,
+    CvValuationResult, InterviewQuestionsResult, AnswerFeedbackResult,
+    GeneratedContent, GeneratedContentCreate, GeneratedContentResponse, GeneratedContentSummary,
+    Job, JobResponse, JobMatchRequest, JobMatchResponse,
+    CvProfile, CvProfileUpdate, CvProfileResponse, JobMatch
 )
 from security import (
-    get_password_hash, verify_password, create_access_token, get_current_user_email
+    get_password_hash, verify_password, create_access_token, get_current_user_email, decode_access_token
 )
-from groq import AsyncGroq
-from email_service import send_welcome_email
+from admission import admit, get_admission_controller, ENDPOINT_LIMITS
+from llm_output import structured_completion, LLMOutputError, output_metrics
+from blob_store import put_blob, release_blob, get_blob_text
+from interview_session import InterviewCoachSession, QuestionsUnavailable
+from worker.matcher import score_jobs_for_user, MATCH_WINDOW
+
+# Shared secret for the /metrics endpoints; they are disabled when it is unset.
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+
+# Cover letters generated in parallel per batch request, and the largest batch accepted.
+BATCH_CONCURRENCY = int(os.environ.get("BATCH_CONCURRENCY", 4))
+MAX_BATCH_SIZE = 10
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 
+# Heavy modules (fitz, fpdf, email_service) are imported inside the endpoints that use
+# them, and clients are built in the lifespan handler, to keep cold starts short.
+# Check with `python benchmarks/startup_benchmark.py` after touching the imports.
+groq_client = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global groq_client
+    from groq import AsyncGroq
+
+    from email_service import start_email_dispatcher, stop_email_dispatcher
+
+    groq_client = AsyncGroq(api_key=os.environ.get("GROQ_API_KEY"))
+    get_engine()
+    get_admission_controller()
+    start_email_dispatcher()
+    yield
+    await stop_email_dispatcher()
+    await groq_client.close()
+    dispose_engine()
+
 # --- App Initialization ---
 app = FastAPI(
     title="AI Job Tools API",
-    description="API for AI Cover Letter and Bio Generation with User Authentication."
+    description="API for AI Cover Letter and Bio Generation with User Authentication.",
+    lifespan=lifespan,
 )
 
 @app.get("/", tags=["Health Check"])
 def read_root():
     return {"status": "ok", "message": "Welcome to the AI Job Tools API!"}
 
-# Initialize Groq Client
-groq_client = AsyncGroq(api_key=os.environ.get("GROQ_API_KEY"))
-
+def require_metrics_token(x_metrics_token: Optional[str] = Header(None)):
+    """Operational endpoints are only served when METRICS_TOKEN is set, and only to callers sending it."""
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_metrics_token or not secrets.compare_digest(x_metrics_token, METRICS_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
 
+@app.get("/metrics/llm-output", tags=["Health Check"], dependencies=[Depends(require_metrics_token)])
+def llm_output_metrics():
+    """
+    How often AI JSON replies were valid, repaired locally, re-prompted, or unusable, per schema.
+    Totals cover every process on this host. Send the METRICS_TOKEN in an X-Metrics-Token header.
+    """
+    return output_metrics.snapshot()
 
 # --- CORS Middleware ---
 origins_regex = r"https://ai-cover-letter-ethiopia.*\.vercel\.app"
@@ -53,23 +99,33 @@ app.add_middleware(
 )
 
 # --- Credit Management Helper ---
-def check_and_deduct_credit(user_email: str, session: Session):
+def check_and_deduct_credit(user_email: str, session: Session, amount: int = 1):
     """
-    Checks if a user has enough credits and deducts one if they do.
-    Raises HTTPException if the user has no credits or is not found.
+    Checks if a user has enough credits and deducts `amount` if they do, in one atomic UPDATE.
+    Raises HTTPException if the user does not have enough credits or is not found.
     """
+    result = session.exec(
+        update(User)
+        .where(User.email == user_email, User.credits >= amount)
+        .values(credits=User.credits - amount)
+    )
+    session.commit()
+    if result.rowcount:
+        return
+
     user = session.exec(select(User).where(User.email == user_email)).first()
     if not user:
         # This case should ideally not be hit if the user is authenticated
         raise HTTPException(status_code=404, detail="User not found")
-
-    if user.credits <= 0:
+    if amount == 1 or user.credits <= 0:
         raise HTTPException(status_code=403, detail="You have run out of credits. Please upgrade to continue.")
+    raise HTTPException(status_code=403, detail=f"This needs {amount} credits but you have {user.credits}. Please upgrade to continue.")
 
-    user.credits -= 1
-    session.add(user)
-    session.commit()
-    session.refresh(user)
+def refund_credits(user_email: str, amount: int, session: Session):
+    """Gives back credits for work that failed after they were deducted."""
+    if amount > 0:
+        session.exec(update(User).where(User.email == user_email).values(credits=User.credits + amount))
+        session.commit()
 
 # --- AI Prompt Helpers ---
 def create_prompt(job_description: str, user_info: str, template: str) -> str:
@@ -99,6 +155,26 @@ def create_prompt(job_description: str, user_info: str, template: str) -> str:
     
     return main_prompt
 
+def create_batch_messages(job_description: str, user_info: str, template: str) -> list:
+    """
+    Same letter as create_prompt, split so the user's info and tone instructions form an identical
+    system-message prefix for every job in a batch; only the job description varies.
+    """
+    system_prompt = f"""**Objective:** Write a professional and compelling cover letter for the job description the user sends, based on this user information.
+
+**User's Info:**
+{user_info}
+"""
+    if template == "Creative":
+        system_prompt += "\n\n**INSTRUCTION:** Write the letter in a creative, engaging, and slightly less formal tone. Use strong, active verbs and show personality."
+    elif template == "Formal":
+        system_prompt += "\n\n**INSTRUCTION:** Adopt a very formal and traditional tone suitable for corporate or academic positions."
+
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": f"**Job Description:**\n{job_description}"},
+    ]
+
 def create_bio_prompt(user_info: str, template: str) -> str:
     # (Your existing bio prompt logic here)
     return f"**Objective:** Write a LinkedIn bio...\n\n**Tone:** {template}\n\n**User's Info:**\n{user_info}"
@@ -107,7 +183,7 @@ def create_bio_prompt(user_info: str, template: str) -> str:
 # --- Authentication Endpoints ---
 # ==========================================================
 @app.post("/api/signup", tags=["Authentication"])
-def signup(user_create: UserCreate, background_tasks: BackgroundTasks, session: Session = Depends(get_session)):
+def signup(user_create: UserCreate, session: Session = Depends(get_session)):
     statement = select(User).where(User.email == user_create.email)
     existing_user = session.exec(statement).first()
     if existing_user:
@@ -119,8 +195,9 @@ def signup(user_create: UserCreate, background_tasks: BackgroundTasks, session:
     session.commit()
     session.refresh(new_user)
 
-    # Send welcome email in the background
-    # background_tasks.add_task(send_welcome_email, to_email=new_user.email)
+    # Queue the welcome email; the email dispatcher delivers it off the request path.
+    from email_service import queue_welcome_email
+    queue_welcome_email(new_user.email)
 
     return {"message": "User created successfully", "user_id": new_user.id}
 
@@ -149,7 +226,7 @@ def get_user_me(current_user_email: str = Depends(get_current_user_email), sessi
 # ==========================================================
 # --- Protected AI Generation Endpoints ---
 # ==========================================================
-@app.post("/api/generate", tags=["AI Generation"])
+@app.post("/api/generate", tags=["AI Generation"], dependencies=[Depends(admit("generate"))])
 async def generate_cover_letter(request: CoverLetterRequest, session: Session = Depends(get_session), current_user_email: str = Depends(get_current_user_email)):
     check_and_deduct_credit(current_user_email, session)
     prompt = create_prompt(request.job_description, request.user_info, request.template)
@@ -161,7 +238,135 @@ async def generate_cover_letter(request: CoverLetterRequest, session: Session =
     )
     return {"cover_letter": chat_completion.choices[0].message.content}
 
-@app.post("/api/generate-bio", tags=["AI Generation"])
+def resolve_batch_jobs(request: BatchCoverLetterRequest, session: Session) -> list:
+    """Returns (job_id, job_description) pairs for the batch: pasted descriptions first, then saved jobs."""
+    batch = [(None, description) for description in request.job_descriptions if description.strip()]
+    if request.job_ids:
+        jobs = {job.id: job for job in session.exec(select(Job).where(Job.id.in_(request.job_ids))).all()}
+        missing = [str(job_id) for job_id in request.job_ids if job_id not in jobs]
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Jobs not found: {', '.join(missing)}")
+        batch += [(job_id, jobs[job_id].message_text) for job_id in request.job_ids]
+
+    if not batch:
+        raise HTTPException(status_code=400, detail="Provide at least one job description or job id.")
+    if len(batch) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"A batch can contain at most {MAX_BATCH_SIZE} jobs.")
+    return batch
+
+def save_batch_letters(user_email: str, request: BatchCoverLetterRequest, batch: list, results: list, session: Session) -> dict:
+    """Saves every generated letter as GeneratedContent in one bulk insert. Returns {index: content_id}."""
+    user = session.exec(select(User).where(User.email == user_email)).first()
+    letters = [result for result in results if "cover_letter" in result]
+    if not letters:
+        return {}
+
+    # Every letter in the batch shares the same CV text, so take all its references at once.
+    cv_blob_hash = put_blob(session, request.user_info, references=len(letters))
+    rows = {}
+    for result in letters:
+        job_description = batch[result["index"]][1]
+        rows[result["index"]] = GeneratedContent(
+            user_id=user.id,
+            content_type="coverLetter",
+            title=f"Cover Letter for {job_description[:30]}...",
+            content=result["cover_letter"],
+            cv_blob_hash=cv_blob_hash,
+            job_description_blob_hash=put_blob(session, job_description),
+        )
+    session.add_all(rows.values())
+    session.commit()
+    return {index: row.id for index, row in rows.items()}
+
+def finish_batch(user_email: str, request: BatchCoverLetterRequest, batch: list, results: list) -> dict:
+    """Refunds the failed letters and saves the others if requested. Returns {index: content_id}."""
+    # Runs after the request may have ended, so it uses its own session.
+    with Session(get_engine()) as session:
+        refund_credits(user_email, sum("error" in result for result in results), session)
+        return save_batch_letters(user_email, request, batch, results, session) if request.save else {}
+
+# Running batches, kept referenced so they finish even after a streaming client disconnects.
+batch_tasks = set()
+
+@app.post("/api/generate-batch", tags=["AI Generation"])
+async def generate_cover_letter_batch(request: BatchCoverLetterRequest, session: Session = Depends(get_session), current_user_email: str = Depends(get_current_user_email)):
+    """
+    Generates cover letters for several jobs from one `user_info`. Credits for the whole batch are
+    deducted up front in one atomic update and refunded for letters that fail. With `stream`,
+    letters are returned as NDJSON lines in completion order; otherwise as one list in request order.
+    """
+    # Admission is taken here rather than through admit(): a dependency's cleanup runs before a
+    # streamed body, and the slot must stay held until the last letter has been generated.
+    token = await asyncio.to_thread(
+        get_admission_controller().acquire, current_user_email, "generate-batch", ENDPOINT_LIMITS["generate-batch"]
+    )
+    try:
+        batch = resolve_batch_jobs(request, session)
+        check_and_deduct_credit(current_user_email, session, amount=len(batch))
+    except BaseException:
+        await asyncio.to_thread(get_admission_controller().release, token)
+        raise
+
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+    client_gone = asyncio.Event()
+    streamed = asyncio.Queue()
+
+    async def generate_one(index: int, job_id, job_description: str) -> dict:
+        result = {"index": index, "job_id": str(job_id) if job_id else None}
+        async with semaphore:
+            if client_gone.is_set() and not request.save:
+                # Nobody will read or store this letter; skip the AI call and refund it.
+                result["error"] = "The client disconnected; the credit for this letter was refunded."
+                return result
+            try:
+                chat_completion = await groq_client.chat.completions.create(
+                    messages=create_batch_messages(job_description, request.user_info, request.template),
+                    model="llama-3.1-8b-instant",
+                    temperature=0.7,
+                    max_tokens=1024,
+                )
+                result["cover_letter"] = chat_completion.choices[0].message.content
+            except Exception:
+                logging.exception(f"Batch cover letter {index} failed")
+                result["error"] = "Generation failed; the credit for this letter was refunded."
+        return result
+
+    async def run_batch() -> tuple:
+        results = []
+        try:
+            tasks = [asyncio.create_task(generate_one(i, job_id, jd)) for i, (job_id, jd) in enumerate(batch)]
+            for next_result in asyncio.as_completed(tasks):
+                result = await next_result
+                results.append(result)
+                streamed.put_nowait(result)
+        finally:
+            await asyncio.to_thread(get_admission_controller().release, token)
+        saved = await asyncio.to_thread(finish_batch, current_user_email, request, batch, results)
+        return results, saved
+
+    batch_task = asyncio.create_task(run_batch())
+    batch_tasks.add(batch_task)
+    batch_task.add_done_callback(batch_tasks.discard)
+
+    if request.stream:
+        async def ndjson_lines():
+            try:
+                for _ in batch:
+                    yield json.dumps(await streamed.get()) + "\n"
+                _, saved = await asyncio.shield(batch_task)
+                yield json.dumps({"done": True, "saved_content_ids": {i: str(cid) for i, cid in saved.items()}}) + "\n"
+            finally:
+                client_gone.set()
+
+        return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+    results, saved = await asyncio.shield(batch_task)
+    results.sort(key=lambda result: result["index"])
+    for result in results:
+        result["content_id"] = saved.get(result["index"])
+    return {"cover_letters": results}
+
+@app.post("/api/generate-bio", tags=["AI Generation"], dependencies=[Depends(admit("generate-bio"))])
 async def generate_bio(request: BioRequest, session: Session = Depends(get_session), current_user_email: str = Depends(get_current_user_email)):
     check_and_deduct_credit(current_user_email, session)
     prompt = create_bio_prompt(request.user_info, request.template)
@@ -173,12 +378,14 @@ async def generate_bio(request: BioRequest, session: Session = Depends(get_sessi
     )
     return {"bio": chat_completion.choices[0].message.content}
 
-@app.post("/api/parse-resume", tags=["AI Generation"])
+@app.post("/api/parse-resume", tags=["AI Generation"], dependencies=[Depends(admit("parse-resume"))])
 async def parse_resume(
     resume: UploadFile = File(...),
     session: Session = Depends(get_session),
     current_user_email: str = Depends(get_current_user_email)
 ):
+    import fitz  # PyMuPDF
+
     check_and_deduct_credit(current_user_email, session)
     if not resume.filename.lower().endswith('.pdf'):
         raise HTTPException(status_code=400, detail="Invalid file type. Please upload a PDF.")
@@ -222,7 +429,17 @@ async def parse_resume(
         raise HTTPException(status_code=500, detail=f"An error occurred while parsing the resume: {str(e)}")
 
 
-@app.post("/api/valuate-cv", tags=["AI Generation"])
+async def structured_ai_response(prompt: str, response_model, **completion_args):
+    """Runs a JSON-mode completion validated (and if needed repaired) against `response_model`."""
+    try:
+        return await structured_completion(
+            groq_client, prompt, response_model, model="llama-3.1-8b-instant", **completion_args
+        )
+    except LLMOutputError:
+        logging.exception("Unusable structured AI response")
+        raise HTTPException(status_code=502, detail="The AI returned an unreadable response. Please try again.")
+
+@app.post("/api/valuate-cv", tags=["AI Generation"], dependencies=[Depends(admit("valuate-cv"))])
 async def valuate_cv(request: CvValuationRequest, session: Session = Depends(get_session), current_user_email: str = Depends(get_current_user_email)):
     check_and_deduct_credit(current_user_email, session)
     def create_cv_valuation_prompt(cv_text: str, job_description: str) -> str:
@@ -249,16 +466,9 @@ async def valuate_cv(request: CvValuationRequest, session: Session = Depends(get
         JSON OUTPUT:
         """
     prompt = create_cv_valuation_prompt(request.cv_text, request.job_description)
-    chat_completion = await groq_client.chat.completions.create(
-        messages=[{"role": "user", "content": prompt}],
-        model="llama-3.1-8b-instant",
-        temperature=0.2,
-        max_tokens=1024,
-        response_format={"type": "json_object"},
-    )
-    return chat_completion.choices[0].message.content
+    return await structured_ai_response(prompt, CvValuationResult, temperature=0.2, max_tokens=1024)
 
-@app.post("/api/generate-interview-questions", tags=["AI Generation"])
+@app.post("/api/generate-interview-questions", tags=["AI Generation"], dependencies=[Depends(admit("interview-questions"))])
 async def generate_interview_questions(request: InterviewQuestionRequest, session: Session = Depends(get_session), current_user_email: str = Depends(get_current_user_email)):
     check_and_deduct_credit(current_user_email, session)
     def create_question_generation_prompt(cv_text: str, job_description: str) -> str:
@@ -284,16 +494,9 @@ async def generate_interview_questions(request: InterviewQuestionRequest, sessio
         JSON OUTPUT:
         """
     prompt = create_question_generation_prompt(request.cv_text, request.job_description)
-    chat_completion = await groq_client.chat.completions.create(
-        messages=[{"role": "user", "content": prompt}],
-        model="llama-3.1-8b-instant",
-        temperature=0.4,
-        max_tokens=1024,
-        response_format={"type": "json_object"},
-    )
-    return json.loads(chat_completion.choices[0].message.content)
+    return await structured_ai_response(prompt, InterviewQuestionsResult, temperature=0.4, max_tokens=1024)
 
-@app.post("/api/analyze-interview-answer", tags=["AI Generation"])
+@app.post("/api/analyze-interview-answer", tags=["AI Generation"], dependencies=[Depends(admit("interview-answer"))])
 async def analyze_interview_answer(request: InterviewAnswerRequest, session: Session = Depends(get_session), current_user_email: str = Depends(get_current_user_email)):
     check_and_deduct_credit(current_user_email, session)
     def create_answer_feedback_prompt(question: str, answer: str) -> str:
@@ -319,14 +522,70 @@ async def analyze_interview_answer(request: InterviewAnswerRequest, session: Ses
         JSON FEEDBACK OUTPUT:
         """
     prompt = create_answer_feedback_prompt(request.question, request.answer)
-    chat_completion = await groq_client.chat.completions.create(
-        messages=[{"role": "user", "content": prompt}],
-        model="llama-3.1-8b-instant",
-        temperature=0.3,
-        max_tokens=1024,
-        response_format={"type": "json_object"},
-    )
-    return json.loads(chat_completion.choices[0].message.content)
+    return await structured_ai_response(prompt, AnswerFeedbackResult, temperature=0.3, max_tokens=1024)
+
+# How long a new interview-coach socket may take to send its auth frame.
+WS_AUTH_TIMEOUT_SECONDS = 10
+
+async def receive_ws_token(websocket: WebSocket) -> str:
+    """Reads the {"type": "auth", "token": "..."} frame a client must send first."""
+    try:
+        message = json.loads(await asyncio.wait_for(websocket.receive_text(), timeout=WS_AUTH_TIMEOUT_SECONDS))
+    except (asyncio.TimeoutError, ValueError):
+        message = None
+    if not isinstance(message, dict) or message.get("type") != "auth" or not isinstance(message.get("token"), str):
+        raise HTTPException(status_code=401, detail="Could not validate credentials")
+    return message["token"]
+
+@app.websocket("/ws/interview-coach/{content_id}")
+async def interview_coach_session(websocket: WebSocket, content_id: UUID):
+    """
+    One mock-interview session over a WebSocket: loads the saved CV and job description once,
+    streams the questions, then streams feedback for each submitted answer with the whole
+    conversation as context. The session costs one credit, refunded if no questions could be
+    generated. Browsers cannot set headers on WebSockets, and a query parameter would end up
+    in access logs, so the JWT comes in the first frame: {"type": "auth", "token": "..."}.
+    The socket is accepted before any check so rejections reach the client as a 1008 close
+    with a reason (a close before accept is only an HTTP 403 to the browser).
+    """
+    await websocket.accept()
+    try:
+        current_user_email = decode_access_token(await receive_ws_token(websocket))
+    except HTTPException as e:
+        await websocket.close(code=1008, reason=e.detail)
+        return
+    except WebSocketDisconnect:
+        return
+
+    with Session(get_engine()) as session:
+        user = session.exec(select(User).where(User.email == current_user_email)).first()
+        content_item = session.get(GeneratedContent, content_id)
+        if not user or not content_item or content_item.user_id != user.id:
+            await websocket.close(code=1008, reason="Content not found")
+            return
+        cv_text = get_blob_text(session, content_item.cv_blob_hash)
+        job_description = get_blob_text(session, content_item.job_description_blob_hash)
+        if not cv_text or not job_description:
+            await websocket.close(code=1008, reason="This saved item has no CV or job description")
+            return
+        try:
+            check_and_deduct_credit(current_user_email, session)
+        except HTTPException as e:
+            await websocket.close(code=1008, reason=e.detail)
+            return
+
+    coach = InterviewCoachSession(websocket, groq_client, current_user_email, cv_text, job_description)
+    try:
+        await coach.run()
+    except WebSocketDisconnect:
+        pass
+    except asyncio.TimeoutError:
+        await websocket.close(code=1000, reason="Session idle for too long")
+    except QuestionsUnavailable:
+        # The session never got going, so give the credit back and let the client start a new one.
+        with Session(get_engine()) as session:
+            refund_credits(current_user_email, 1, session)
+        await websocket.close(code=1013, reason="Could not generate interview questions. Please try again.")
 
 # ==========================================================
 # --- Job Feed Endpoint ---
@@ -338,69 +597,75 @@ def get_jobs(session: Session = Depends(get_session), current_user_email: str =
     return jobs
 
 
-def create_job_match_prompt(cv_text: str, job_description: str) -> str:
-    return f"""
-    Act as an expert technical recruiter. Your task is to analyze the following CV against the Job Description and return a JSON object with your analysis.
-    The final output MUST be a single, valid JSON object and nothing else.
-
-    1.  Calculate a "match_score" from 0 to 100 based on how well the CV aligns with the job.
-    2.  Write a brief, one-sentence "match_summary" explaining the reason for your score (e.g., "Strong match in Python and data analysis, but lacks cloud experience.").
+def save_cv_profile(user: User, cv_text: str, auto_match: Optional[bool], session: Session) -> CvProfile:
+    """
+    Creates or updates the user's stored CV. A new or changed CV marks the user's
+    stored match scores as stale; they are replaced when it is next scored.
+    `auto_match=None` keeps the user's current choice (on for a new profile).
+    """
+    profile = session.get(CvProfile, user.id)
+    if profile is None:
+        profile = CvProfile(
+            user_id=user.id, cv_text=cv_text, auto_match=True if auto_match is None else auto_match, matches_stale=True
+        )
+    else:
+        if profile.cv_text != cv_text:
+            profile.cv_text = cv_text
+            profile.matches_stale = True
+        if auto_match is not None:
+            profile.auto_match = auto_match
+        profile.updated_at = datetime.utcnow()
+    session.add(profile)
+    session.commit()
+    session.refresh(profile)
+    return profile
 
-    The JSON object must have these exact keys: "match_score" (integer) and "match_summary" (string).
+@app.put("/api/profile/cv", response_model=CvProfileResponse, tags=["Jobs"])
+def update_cv_profile(
+    profile_update: CvProfileUpdate,
+    session: Session = Depends(get_session),
+    current_user_email: str = Depends(get_current_user_email)
+):
+    """
+    Stores the CV used for job matching. Nothing is scored here: with `auto_match` on, the
+    scraper's background matcher scores new jobs (and rescores a changed CV) on its next run,
+    and /api/match-jobs scores a stale CV on demand, charged like any other AI call.
+    """
+    user = session.exec(select(User).where(User.email == current_user_email)).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
 
-    ---
-    CV TEXT:
-    {cv_text}
-    ---
-    JOB DESCRIPTION:
-    {job_description}
-    ---
+    return save_cv_profile(user, profile_update.cv_text, profile_update.auto_match, session)
 
-    JSON OUTPUT:
-    """
+@app.post("/api/match-jobs", response_model=List[JobMatchResponse], tags=["Jobs"], dependencies=[Depends(admit("match-jobs"))])
+async def match_jobs(request: JobMatchRequest, session: Session = Depends(get_session), current_user_email: str = Depends(get_current_user_email)):
+    check_and_deduct_credit(current_user_email, session)
+    user = session.exec(select(User).where(User.email == current_user_email)).first()
 
-async def get_job_match_analysis(job: Job, cv_text: str) -> JobMatchResponse:
-    prompt = create_job_match_prompt(cv_text, job.message_text)
-    try:
-        chat_completion = await groq_client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model="llama-3.1-8b-instant",
-            temperature=0.2,
-            max_tokens=1024,
-            response_format={"type": "json_object"},
-        )
-        analysis = json.loads(chat_completion.choices[0].message.content)
-        await asyncio.sleep(1.5) # Add delay to respect rate limit
-        return JobMatchResponse(
-            id=job.id,
-            message_text=job.message_text,
-            posted_at=job.posted_at,
-            match_score=analysis.get("match_score", 0),
-            match_summary=analysis.get("match_summary", "Could not analyze.")
-        )
-    except Exception as e:
-        logging.error(f"Error analyzing job {job.id}: {e}")
-        return JobMatchResponse(
+    # Scores are precomputed by the background matcher. Only a new or changed CV
+    # (or a first visit) needs scoring inline; otherwise this is an indexed read.
+    profile = save_cv_profile(user, request.cv_text, None, session)
+    has_matches = session.exec(select(JobMatch.id).where(JobMatch.user_id == user.id).limit(1)).first()
+    if profile.matches_stale or not has_matches:
+        await score_jobs_for_user(get_engine(), groq_client, user.id, request.cv_text, rescore=profile.matches_stale)
+
+    statement = (
+        select(Job, JobMatch)
+        .join(JobMatch, JobMatch.job_id == Job.id)
+        .where(JobMatch.user_id == user.id)
+        .order_by(JobMatch.match_score.desc(), Job.posted_at.desc())
+        .limit(MATCH_WINDOW)
+    )
+    return [
+        JobMatchResponse(
             id=job.id,
             message_text=job.message_text,
             posted_at=job.posted_at,
-            match_score=0,
-            match_summary="Error during analysis."
+            match_score=match.match_score,
+            match_summary=match.match_summary,
         )
-
-@app.post("/api/match-jobs", response_model=List[JobMatchResponse], tags=["Jobs"])
-async def match_jobs(request: JobMatchRequest, session: Session = Depends(get_session), current_user_email: str = Depends(get_current_user_email)):
-    check_and_deduct_credit(current_user_email, session)
-    statement = select(Job).order_by(Job.posted_at.desc()).limit(50)
-    jobs = session.exec(statement).all()
-
-    tasks = [get_job_match_analysis(job, request.cv_text) for job in jobs]
-    matched_jobs = await asyncio.gather(*tasks)
-
-    # Sort by match score
-    sorted_jobs = sorted(matched_jobs, key=lambda j: j.match_score, reverse=True)
-    
-    return sorted_jobs
+        for job, match in session.exec(statement).all()
+    ]
 
 # ==========================================================
 # --- Protected Content CRUD Endpoints ---
@@ -413,15 +678,27 @@ def save_content(content_data: GeneratedContentCreate, session: Session = Depend
 
     new_content = GeneratedContent.model_validate(content_data, update={
         "user_id": user.id,
-        "original_cv_text": content_data.original_cv_text,
-        "original_job_description": content_data.original_job_description
+        "cv_blob_hash": put_blob(session, content_data.original_cv_text),
+        "job_description_blob_hash": put_blob(session, content_data.original_job_description),
     })
     session.add(new_content)
     session.commit()
     session.refresh(new_content)
-    return new_content
+    return GeneratedContentResponse(
+        **new_content.model_dump(),
+        original_cv_text=content_data.original_cv_text,
+        original_job_description=content_data.original_job_description,
+    )
 
-@app.get("/api/content", response_model=List[GeneratedContentResponse], tags=["Content"])
+def to_content_response(content_item: GeneratedContent, session: Session) -> GeneratedContentResponse:
+    """Loads the stored CV and job description for a single content item."""
+    return GeneratedContentResponse(
+        **content_item.model_dump(),
+        original_cv_text=get_blob_text(session, content_item.cv_blob_hash),
+        original_job_description=get_blob_text(session, content_item.job_description_blob_hash),
+    )
+
+@app.get("/api/content", response_model=List[GeneratedContentSummary], tags=["Content"])
 def get_user_content(session: Session = Depends(get_session), current_user_email: str = Depends(get_current_user_email)):
     user = session.exec(select(User).where(User.email == current_user_email)).first()
     if not user:
@@ -448,7 +725,7 @@ def get_single_content_item(
     if content_item.user_id != user.id:
         raise HTTPException(status_code=403, detail="Not authorized to view this content")
 
-    return content_item
+    return to_content_response(content_item, session)
 
 @app.patch("/api/content/{content_id}", response_model=GeneratedContentResponse, tags=["Content"])
 def update_content_title(
@@ -471,7 +748,7 @@ def update_content_title(
     session.add(content_item)
     session.commit()
     session.refresh(content_item)
-    return content_item
+    return to_content_response(content_item, session)
 
 @app.delete("/api/content/{content_id}", status_code=204, tags=["Content"])
 def delete_content(
@@ -491,6 +768,9 @@ def delete_content(
         raise HTTPException(status_code=403, detail="Not authorized to delete this content")
 
     session.delete(content_item)
+    session.flush()
+    release_blob(session, content_item.cv_blob_hash)
+    release_blob(session, content_item.job_description_blob_hash)
     session.commit()
     return
 
@@ -516,6 +796,8 @@ def download_pdf(
         raise HTTPException(status_code=403, detail="Not authorized to access this content")
 
     try:
+        from fpdf import FPDF
+
         pdf = FPDF()
         pdf.add_page()
         pdf.set_font("Arial", "B", 16)
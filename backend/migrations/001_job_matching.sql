@@ -0,0 +1,45 @@
+-- =================================================================
+-- Background job matching: stored CVs and precomputed match scores.
+-- Run in the Supabase SQL editor.
+-- =================================================================
+
+CREATE TABLE IF NOT EXISTS public.cv_profiles (
+    user_id UUID PRIMARY KEY REFERENCES public.users(id) ON DELETE CASCADE,
+    cv_text TEXT NOT NULL,
+    auto_match BOOLEAN NOT NULL DEFAULT TRUE,
+    updated_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS ix_cv_profiles_auto_match ON public.cv_profiles (auto_match);
+
+CREATE TABLE IF NOT EXISTS public.job_matches (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    user_id UUID NOT NULL REFERENCES public.users(id) ON DELETE CASCADE,
+    job_id UUID NOT NULL REFERENCES public.jobs(id) ON DELETE CASCADE,
+    match_score INTEGER NOT NULL,
+    match_summary TEXT NOT NULL,
+    scored_by VARCHAR NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    CONSTRAINT uq_job_matches_user_job UNIQUE (user_id, job_id)
+);
+
+-- Serves /api/match-jobs: one user's matches ordered by score.
+CREATE INDEX IF NOT EXISTS ix_job_matches_user_score ON public.job_matches (user_id, match_score);
+
+ALTER TABLE public.cv_profiles ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.job_matches ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Allow individual user to select their own CV profile" ON public.cv_profiles;
+DROP POLICY IF EXISTS "Allow individual user to select their own job matches" ON public.job_matches;
+
+CREATE POLICY "Allow individual user to select their own CV profile"
+ON public.cv_profiles
+FOR SELECT
+TO authenticated
+USING (auth.uid() = user_id);
+
+CREATE POLICY "Allow individual user to select their own job matches"
+ON public.job_matches
+FOR SELECT
+TO authenticated
+USING (auth.uid() = user_id);
@@ -0,0 +1,25 @@
+-- =================================================================
+-- Content-addressed storage for the CV and job description saved
+-- with each generated_content row.
+--
+-- 1. Run this file in the Supabase SQL editor.
+-- 2. Backfill existing rows (from the backend directory):
+--        python -m migrations.backfill_content_blobs
+-- 3. Once the backfill reports nothing left, drop the old columns:
+--        python -m migrations.backfill_content_blobs --drop-old-columns
+-- =================================================================
+
+CREATE TABLE IF NOT EXISTS public.content_blobs (
+    hash VARCHAR(64) PRIMARY KEY,          -- SHA-256 of the uncompressed UTF-8 text
+    data BYTEA NOT NULL,                   -- zlib-compressed text
+    size INTEGER NOT NULL,                 -- uncompressed size in bytes
+    ref_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+ALTER TABLE public.generated_content
+    ADD COLUMN IF NOT EXISTS cv_blob_hash VARCHAR(64) REFERENCES public.content_blobs(hash),
+    ADD COLUMN IF NOT EXISTS job_description_blob_hash VARCHAR(64) REFERENCES public.content_blobs(hash);
+
+-- Blobs are only read through the API, never directly by clients.
+ALTER TABLE public.content_blobs ENABLE ROW LEVEL SECURITY;
@@ -0,0 +1,23 @@
+-- =================================================================
+-- Jobs retention: index the hot table and add the archive table
+-- that worker/retention.py moves old jobs into.
+-- Run in the Supabase SQL editor.
+-- =================================================================
+
+-- Every feed and match query is "ORDER BY posted_at DESC LIMIT n".
+CREATE INDEX IF NOT EXISTS ix_jobs_posted_at ON public.jobs (posted_at);
+
+CREATE TABLE IF NOT EXISTS public.jobs_archive (
+    id UUID PRIMARY KEY,
+    message_id BIGINT NOT NULL UNIQUE,
+    channel_name VARCHAR NOT NULL,
+    message_text_zlib BYTEA NOT NULL,      -- zlib-compressed UTF-8 message text
+    posted_at TIMESTAMPTZ NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL,
+    archived_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS ix_jobs_archive_posted_at ON public.jobs_archive (posted_at);
+
+-- The archive is only read by maintenance tooling, never by clients.
+ALTER TABLE public.jobs_archive ENABLE ROW LEVEL SECURITY;
@@ -0,0 +1,7 @@
+-- =================================================================
+-- Marks CV profiles whose job_matches were computed for an older CV.
+-- Stale matches are kept (and served) until the new scores replace them.
+-- Run in the Supabase SQL editor after 001_job_matching.sql.
+-- =================================================================
+
+ALTER TABLE public.cv_profiles ADD COLUMN IF NOT EXISTS matches_stale BOOLEAN NOT NULL DEFAULT FALSE;
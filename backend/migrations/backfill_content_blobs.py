@@ -0,0 +1,72 @@
+"""
+Moves original_cv_text / original_job_description of existing generated_content rows
+into content_blobs. Safe to re-run: rows that already point to blobs are skipped.
+
+Run from the backend directory after migrations/002_content_blobs.sql:
+    python -m migrations.backfill_content_blobs [--batch-size 500] [--drop-old-columns]
+"""
+import argparse
+import logging
+
+from sqlalchemy import text
+from sqlmodel import Session
+
+from database import get_engine
+from blob_store import put_blob
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Empty texts have no blob (put_blob returns None for them), so they never count as pending.
+PENDING_ROWS = """
+    SELECT id, original_cv_text, original_job_description, cv_blob_hash, job_description_blob_hash
+    FROM generated_content
+    WHERE (NULLIF(original_cv_text, '') IS NOT NULL AND cv_blob_hash IS NULL)
+       OR (NULLIF(original_job_description, '') IS NOT NULL AND job_description_blob_hash IS NULL)
+    LIMIT :limit
+"""
+
+
+def backfill(batch_size: int) -> int:
+    migrated = 0
+    with Session(get_engine()) as session:
+        while True:
+            rows = session.exec(text(PENDING_ROWS).bindparams(limit=batch_size)).all()
+            if not rows:
+                break
+            for row in rows:
+                session.exec(
+                    text(
+                        "UPDATE generated_content SET cv_blob_hash = :cv, job_description_blob_hash = :jd "
+                        "WHERE id = :id"
+                    ).bindparams(
+                        id=row.id,
+                        cv=row.cv_blob_hash or put_blob(session, row.original_cv_text),
+                        jd=row.job_description_blob_hash or put_blob(session, row.original_job_description),
+                    )
+                )
+            session.commit()
+            migrated += len(rows)
+            logging.info(f"Migrated {migrated} row(s) so far.")
+    return migrated
+
+
+def drop_old_columns() -> None:
+    with Session(get_engine()) as session:
+        remaining = session.exec(text(PENDING_ROWS).bindparams(limit=1)).first()
+        if remaining:
+            raise SystemExit("Some rows are not migrated yet; run the backfill first.")
+        session.exec(text("ALTER TABLE generated_content DROP COLUMN original_cv_text"))
+        session.exec(text("ALTER TABLE generated_content DROP COLUMN original_job_description"))
+        session.commit()
+    logging.info("Dropped original_cv_text and original_job_description.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--drop-old-columns", action="store_true", help="drop the inline text columns afterwards")
+    args = parser.parse_args()
+
+    logging.info(f"Backfill complete: {backfill(args.batch_size)} row(s) migrated.")
+    if args.drop_old_columns:
+        drop_old_columns()
@@ -1,5 +1,6 @@
 from sqlmodel import Field, SQLModel
-from typing import Optional
+from sqlalchemy import Column, Index, LargeBinary, UniqueConstraint
+from typing import List, Optional
 from uuid import UUID, uuid4
 from datetime import datetime
 from pydantic import BaseModel
@@ -24,8 +25,18 @@ class GeneratedContent(SQLModel, table=True):
     title: str = Field(default="Untitled")
     content: str
     created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
-    original_cv_text: Optional[str] = None
-    original_job_description: Optional[str] = None
+    # The CV and job description live in content_blobs (see blob_store.py) so repeats are stored once.
+    cv_blob_hash: Optional[str] = Field(default=None, foreign_key="content_blobs.hash")
+    job_description_blob_hash: Optional[str] = Field(default=None, foreign_key="content_blobs.hash")
+
+class ContentBlob(SQLModel, table=True):
+    __tablename__ = "content_blobs"
+
+    hash: str = Field(primary_key=True, max_length=64)  # SHA-256 of the uncompressed UTF-8 text
+    data: bytes = Field(sa_column=Column(LargeBinary, nullable=False))  # zlib-compressed text
+    size: int  # uncompressed size in bytes
+    ref_count: int = Field(default=0)
+    created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
 
 
 # --- Pydantic Models (for API requests/responses) ---
@@ -53,6 +64,14 @@ class CoverLetterRequest(BaseModel):
     user_info: str
     template: str = "Professional"
 
+class BatchCoverLetterRequest(BaseModel):
+    user_info: str
+    template: str = "Professional"
+    job_descriptions: List[str] = []
+    job_ids: List[UUID] = []  # jobs from the scraped job feed
+    save: bool = False  # save each letter as GeneratedContent
+    stream: bool = False  # return NDJSON lines as letters complete
+
 class BioRequest(BaseModel):
     user_info: str
     template: str
@@ -65,12 +84,15 @@ class GeneratedContentCreate(BaseModel):
     original_cv_text: Optional[str] = None
     original_job_description: Optional[str] = None
 
-class GeneratedContentResponse(BaseModel):
+class GeneratedContentSummary(BaseModel):
+    """List view of saved content; leaves out the stored CV and job description."""
     id: UUID
     content_type: str
     title: str
     content: str
     created_at: datetime
+
+class GeneratedContentResponse(GeneratedContentSummary):
     original_cv_text: Optional[str] = None
     original_job_description: Optional[str] = None
 
@@ -89,9 +111,21 @@ class Job(SQLModel, table=True):
     message_id: int = Field(unique=True, index=True)
     channel_name: str
     message_text: str
-    posted_at: datetime
+    posted_at: datetime = Field(index=True)  # every feed and match query sorts by this
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
+class JobArchive(SQLModel, table=True):
+    """Jobs moved out of the hot `jobs` table by worker/retention.py."""
+    __tablename__ = "jobs_archive"
+
+    id: UUID = Field(primary_key=True)
+    message_id: int = Field(unique=True, index=True)
+    channel_name: str
+    message_text_zlib: bytes = Field(sa_column=Column(LargeBinary, nullable=False))  # zlib-compressed UTF-8
+    posted_at: datetime = Field(index=True)
+    created_at: datetime
+    archived_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+
 class JobResponse(BaseModel):
     id: UUID
     message_text: str
@@ -100,11 +134,44 @@ class JobResponse(BaseModel):
 class JobMatchRequest(BaseModel):
     cv_text: str
 
+class CvProfile(SQLModel, table=True):
+    __tablename__ = "cv_profiles"
+
+    user_id: UUID = Field(foreign_key="users.id", primary_key=True)
+    cv_text: str
+    auto_match: bool = Field(default=True, index=True)  # opt-in for background scoring of new jobs
+    matches_stale: bool = False  # the CV changed since the stored job_matches were computed
+    updated_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+
+class JobMatch(SQLModel, table=True):
+    __tablename__ = "job_matches"
+    __table_args__ = (
+        UniqueConstraint("user_id", "job_id", name="uq_job_matches_user_job"),
+        Index("ix_job_matches_user_score", "user_id", "match_score"),
+    )
+
+    id: Optional[UUID] = Field(default_factory=uuid4, primary_key=True)
+    user_id: UUID = Field(foreign_key="users.id")
+    job_id: UUID = Field(foreign_key="jobs.id")
+    match_score: int = Field(ge=0, le=100)
+    match_summary: str
+    scored_by: str  # 'local' or 'llm'
+    created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+
+class CvProfileUpdate(BaseModel):
+    cv_text: str
+    auto_match: bool = True
+
+class CvProfileResponse(BaseModel):
+    cv_text: str
+    auto_match: bool
+    updated_at: datetime
+
 class JobMatchResponse(BaseModel):
     id: UUID
     message_text: str
     posted_at: datetime
-    match_score: int
+    match_score: int = Field(ge=0, le=100)
     match_summary: str
 
 class InterviewQuestionRequest(BaseModel):
@@ -114,3 +181,25 @@ class InterviewQuestionRequest(BaseModel):
 class InterviewAnswerRequest(BaseModel):
     question: str
     answer: str
+
+# --- LLM Structured Outputs ---
+# Expected shapes of the JSON the model returns (validated and repaired in llm_output.py).
+# Fields without a default are required: if they cannot be recovered, the model is re-prompted.
+
+class CvValuationResult(BaseModel):
+    matchScore: int = Field(ge=0, le=100)
+    matchedKeywords: List[str] = []
+    missingKeywords: List[str] = []
+    suggestions: List[str] = []
+
+class InterviewQuestionsResult(BaseModel):
+    questions: List[str]
+
+class AnswerFeedbackResult(BaseModel):
+    positive_feedback: str = ""
+    constructive_feedback: str
+    example_improvement: str = ""
+
+class JobMatchAnalysis(BaseModel):
+    match_score: int = Field(ge=0, le=100)
+    match_summary: str = "Could not analyze."
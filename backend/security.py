@@ -3,15 +3,12 @@ from datetime import datetime, timedelta, timezone
 from typing import Optional
 from passlib.context import CryptContext
 from jose import JWTError, jwt
-from dotenv import load_dotenv
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 
-# Load environment variables from .env file
-load_dotenv()
-
 # --- Configuration ---
+# Environment variables are loaded from .env by database.py, which main.py imports first.
 SECRET_KEY = os.environ.get("SECRET_KEY")
 ALGORITHM = os.environ.get("ALGORITHM")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.environ.get("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
@@ -54,6 +51,13 @@ def get_current_user_email(token: str = Depends(oauth2_scheme)) -> str:
     Decodes the JWT token to get the user's email.
     This function is used as a dependency in protected routes.
     """
+    return decode_access_token(token)
+
+def decode_access_token(token: str) -> str:
+    """
+    Returns the email in a JWT access token, or raises a 401 HTTPException.
+    Used directly where there is no Authorization header, e.g. WebSocket connections.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
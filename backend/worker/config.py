@@ -1,4 +1,5 @@
 import os
+import sys
 from dotenv import load_dotenv
 from pathlib import Path
 
@@ -7,7 +8,13 @@ from pathlib import Path
 env_path = Path(__file__).parent.parent / '.env'
 load_dotenv(dotenv_path=env_path)
 
+# Let the worker scripts reuse backend modules (models, llm_output) without a package install.
+sys.path.append(str(Path(__file__).parent.parent))
+
 API_ID = os.environ.get("TELEGRAM_API_ID")
 API_HASH = os.environ.get("TELEGRAM_API_HASH")
 DATABASE_URL = os.environ.get("DATABASE_URL")
+GROQ_API_KEY = os.environ.get("GROQ_API_KEY")
 TARGET_CHANNEL = 'freelance_ethio'
+# Jobs posted longer ago than this are moved out of the hot table by retention.py.
+JOB_RETENTION_DAYS = int(os.environ.get("JOB_RETENTION_DAYS", 30))
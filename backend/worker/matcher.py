@@ -0,0 +1,250 @@
+import os
+import re
+import uuid
+import asyncio
+import logging
+import datetime
+from sqlalchemy import Table, MetaData, select, insert, update, delete
+from sqlalchemy.exc import IntegrityError
+
+# --- Tuning ---
+# Only the newest jobs are scored, the same window the job feed shows.
+MATCH_WINDOW = int(os.environ.get("MATCH_WINDOW", 50))
+# Jobs whose local keyword score reaches this threshold get a full LLM analysis.
+MATCH_LLM_THRESHOLD = int(os.environ.get("MATCH_LLM_THRESHOLD", 20))
+MATCH_LLM_CONCURRENCY = int(os.environ.get("MATCH_LLM_CONCURRENCY", 4))
+
+_WORD_RE = re.compile(r"[a-z][a-z0-9+#.]{2,}")
+_STOPWORDS = {
+    "the", "and", "for", "with", "you", "your", "are", "our", "will", "this", "that", "from",
+    "have", "has", "who", "can", "all", "any", "not", "but", "job", "jobs", "work", "working",
+    "apply", "required", "requirements", "experience", "years", "year", "must", "should",
+    "good", "strong", "knowledge", "ability", "able", "skills", "skill", "position", "company",
+    "candidate", "candidates", "please", "send", "via", "contact", "salary", "deadline",
+}
+
+
+def tokenize(text: str) -> set:
+    """Lowercased keyword set of a text, minus stopwords and trailing punctuation."""
+    words = (w.rstrip(".") for w in _WORD_RE.findall(text.lower()))
+    return {w for w in words if len(w) > 2 and w not in _STOPWORDS}
+
+
+def local_match_score(cv_keywords: set, job_text: str) -> int:
+    """Cheap 0-100 score: the share of the job's keywords that also appear in the CV."""
+    job_keywords = tokenize(job_text)
+    if not job_keywords:
+        return 0
+    return round(100 * len(job_keywords & cv_keywords) / len(job_keywords))
+
+
+def create_job_match_prompt(cv_text: str, job_description: str) -> str:
+    return f"""
+    Act as an expert technical recruiter. Your task is to analyze the following CV against the Job Description and return a JSON object with your analysis.
+    The final output MUST be a single, valid JSON object and nothing else.
+
+    1.  Calculate a "match_score" from 0 to 100 based on how well the CV aligns with the job.
+    2.  Write a brief, one-sentence "match_summary" explaining the reason for your score (e.g., "Strong match in Python and data analysis, but lacks cloud experience.").
+
+    The JSON object must have these exact keys: "match_score" (integer) and "match_summary" (string).
+
+    ---
+    CV TEXT:
+    {cv_text}
+    ---
+    JOB DESCRIPTION:
+    {job_description}
+    ---
+
+    JSON OUTPUT:
+    """
+
+
+async def get_llm_match_analysis(groq_client, cv_text: str, job_text: str) -> dict:
+    # Backend modules are importable here once config.py (or the app) has set up sys.path.
+    from llm_output import structured_completion
+    from models import JobMatchAnalysis
+
+    prompt = create_job_match_prompt(cv_text, job_text)
+    analysis = await structured_completion(
+        groq_client, prompt, JobMatchAnalysis,
+        model="llama-3.1-8b-instant",
+        temperature=0.2,
+        max_tokens=1024,
+    )
+    return analysis.model_dump()
+
+
+async def _score_job(groq_client, semaphore: asyncio.Semaphore, cv_text: str, cv_keywords: set, job) -> dict:
+    """Scores one job locally, escalating to the LLM only when the local score is promising."""
+    local_score = local_match_score(cv_keywords, job.message_text)
+    result = {
+        "job_id": job.id,
+        "match_score": local_score,
+        "match_summary": "Low keyword overlap with your CV.",
+        "scored_by": "local",
+    }
+    if local_score < MATCH_LLM_THRESHOLD:
+        return result
+
+    result["match_summary"] = "Keyword match only; detailed analysis unavailable."
+    if groq_client is None:
+        return result
+
+    async with semaphore:
+        try:
+            analysis = await get_llm_match_analysis(groq_client, cv_text, job.message_text)
+            result.update(analysis, scored_by="llm")
+        except Exception as e:
+            logging.error(f"LLM analysis failed for job {job.id}, keeping local score: {e}")
+        await asyncio.sleep(1.5) # Add delay to respect rate limit
+    return result
+
+
+_reflected_tables = {}
+
+
+def _tables(engine, *names) -> list:
+    """Reflects the named tables once per engine; reflection is a round trip per table."""
+    key = (engine.url, names)
+    if key not in _reflected_tables:
+        metadata = MetaData()
+        _reflected_tables[key] = [Table(name, metadata, autoload_with=engine) for name in names]
+    return _reflected_tables[key]
+
+
+def _load_jobs_to_score(engine, user_id, rescore: bool) -> list:
+    """The newest jobs: all of them when rescoring, otherwise only those without a stored match."""
+    jobs_table, matches_table = _tables(engine, 'jobs', 'job_matches')
+    recent_jobs = (
+        select(jobs_table.c.id, jobs_table.c.message_text)
+        .order_by(jobs_table.c.posted_at.desc())
+        .limit(MATCH_WINDOW)
+    )
+    with engine.connect() as connection:
+        if rescore:
+            return connection.execute(recent_jobs).all()
+        already_scored = select(matches_table.c.job_id).where(matches_table.c.user_id == user_id)
+        scored_ids = set(connection.execute(already_scored).scalars())
+        return [job for job in connection.execute(recent_jobs) if job.id not in scored_ids]
+
+
+def _save_matches(engine, user_id, results: list, rescore: bool) -> int:
+    """
+    Inserts all match rows in one statement. Returns how many were written.
+    When rescoring, the user's old matches are replaced in the same transaction, so readers
+    see either the old scores or the new ones, never an empty list.
+    """
+    matches_table, = _tables(engine, 'job_matches')
+    now = datetime.datetime.now(datetime.timezone.utc)
+    rows = [{"id": uuid.uuid4(), "user_id": user_id, "created_at": now, **result} for result in results]
+
+    try:
+        with engine.begin() as connection:
+            if rescore:
+                connection.execute(delete(matches_table).where(matches_table.c.user_id == user_id))
+            if rows:
+                connection.execute(insert(matches_table), rows)
+        return len(rows)
+    except IntegrityError:
+        pass
+
+    # Another run scored some of these pairs concurrently; insert only the rest.
+    with engine.begin() as connection:
+        scored_ids = set(connection.execute(
+            select(matches_table.c.job_id).where(matches_table.c.user_id == user_id)
+        ).scalars())
+        rows = [row for row in rows if row["job_id"] not in scored_ids]
+        if rows:
+            connection.execute(insert(matches_table), rows)
+    return len(rows)
+
+
+def _set_stale(engine, user_id, cv_text: str, stale: bool) -> bool:
+    """
+    Flips matches_stale for this exact CV text. Clearing it is how a rescore is claimed:
+    only one caller wins, the others keep serving the stored matches.
+    Returns whether the flag was changed.
+    """
+    profiles_table, = _tables(engine, 'cv_profiles')
+    with engine.begin() as connection:
+        result = connection.execute(
+            update(profiles_table)
+            .where(
+                profiles_table.c.user_id == user_id,
+                profiles_table.c.cv_text == cv_text,
+                profiles_table.c.matches_stale.is_(not stale),
+            )
+            .values(matches_stale=stale)
+        )
+    return result.rowcount > 0
+
+
+async def score_jobs_for_user(engine, groq_client, user_id, cv_text: str, rescore: bool = False) -> int:
+    """
+    Scores the newest jobs that have no stored match for this user yet.
+    With `rescore=True` (the CV changed) every job in the window is scored again and the
+    user's old matches are replaced once the new scores are ready; the old ones are served
+    meanwhile, also to concurrent callers, which skip the rescore instead of repeating it.
+    Returns the number of match rows written.
+    """
+    # The database calls are blocking, so they run in a worker thread to keep the event loop free.
+    if rescore and not await asyncio.to_thread(_set_stale, engine, user_id, cv_text, False):
+        return 0  # another run is already rescoring this CV (or has finished)
+    try:
+        jobs = await asyncio.to_thread(_load_jobs_to_score, engine, user_id, rescore)
+        if not jobs and not rescore:
+            return 0
+
+        cv_keywords = tokenize(cv_text)
+        semaphore = asyncio.Semaphore(MATCH_LLM_CONCURRENCY)
+        results = await asyncio.gather(*[
+            _score_job(groq_client, semaphore, cv_text, cv_keywords, job) for job in jobs
+        ])
+
+        saved = await asyncio.to_thread(_save_matches, engine, user_id, results, rescore)
+    except BaseException:
+        if rescore:
+            # Hand the rescore back so the next run retries it.
+            await asyncio.to_thread(_set_stale, engine, user_id, cv_text, True)
+        raise
+    logging.info(f"Stored {saved} job match(es) for user {user_id}.")
+    return saved
+
+
+async def score_new_jobs(engine, groq_client) -> int:
+    """
+    Scores unscored jobs for every user who opted in to background matching, and rescores
+    users whose CV changed since their matches were computed.
+    """
+    profiles_table, = _tables(engine, 'cv_profiles')
+
+    with engine.connect() as connection:
+        profiles = connection.execute(
+            select(profiles_table.c.user_id, profiles_table.c.cv_text, profiles_table.c.matches_stale)
+            .where(profiles_table.c.auto_match.is_(True))
+        ).all()
+
+    total = 0
+    for profile in profiles:
+        try:
+            total += await score_jobs_for_user(
+                engine, groq_client, profile.user_id, profile.cv_text, rescore=profile.matches_stale
+            )
+        except Exception as e:
+            logging.error(f"Background matching failed for user {profile.user_id}: {e}", exc_info=True)
+
+    from llm_output import output_metrics
+    # This process's share of /metrics/llm-output, for hosts that do not share its SQLite file.
+    for schema, counts in output_metrics.process_counts.items():
+        logging.info(f"LLM output outcomes for {schema} this run: {dict(counts)}")
+    return total
+
+
+if __name__ == "__main__":
+    from sqlalchemy import create_engine
+    from groq import AsyncGroq
+    from config import DATABASE_URL, GROQ_API_KEY
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    asyncio.run(score_new_jobs(create_engine(DATABASE_URL), AsyncGroq(api_key=GROQ_API_KEY)))
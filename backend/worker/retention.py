@@ -0,0 +1,100 @@
+import gzip
+import json
+import zlib
+import logging
+import argparse
+import datetime
+from sqlalchemy import create_engine, Table, MetaData, select, delete, func
+from sqlalchemy.dialects import postgresql, sqlite
+from config import DATABASE_URL, JOB_RETENTION_DAYS
+
+# --- Setup Logging ---
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Scheduled maintenance for the jobs table: moves jobs posted before the retention cutoff
+# out of the hot `jobs` table, either into the compressed `jobs_archive` table or into a
+# gzipped JSON-lines export file. Run it like the scraper, e.g. daily from cron:
+#     python worker/retention.py [--days 30] [--export jobs-2025-01.jsonl.gz] [--dry-run]
+
+BATCH_SIZE = 1000
+
+
+def archive_insert(engine, archive_table):
+    """
+    INSERT into jobs_archive that skips message_ids already archived, so a job that was
+    archived, scraped back in and archived again cannot wedge every later run on the
+    UNIQUE(message_id) constraint.
+    """
+    dialect = postgresql if engine.dialect.name == "postgresql" else sqlite
+    return dialect.insert(archive_table).on_conflict_do_nothing(index_elements=["message_id"])
+
+
+def archive_old_jobs(engine, days: int, export_path: str = None, dry_run: bool = False) -> int:
+    """Moves jobs older than `days` out of the hot table in batches. Returns how many were moved."""
+    metadata = MetaData()
+    jobs_table = Table('jobs', metadata, autoload_with=engine)
+    archive_table = None if export_path else Table('jobs_archive', metadata, autoload_with=engine)
+    cutoff = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=days)
+
+    old_jobs = (
+        select(jobs_table)
+        .where(jobs_table.c.posted_at < cutoff)
+        .order_by(jobs_table.c.posted_at)
+        .limit(BATCH_SIZE)
+    )
+
+    if dry_run:
+        with engine.connect() as connection:
+            count = connection.execute(
+                select(func.count()).select_from(jobs_table).where(jobs_table.c.posted_at < cutoff)
+            ).scalar_one()
+        logging.info(f"Dry run: {count} job(s) posted before {cutoff:%Y-%m-%d} would be archived.")
+        return 0
+
+    export_file = gzip.open(export_path, "at", encoding="utf-8") if export_path else None
+    moved = 0
+    try:
+        with engine.connect() as connection:
+            while True:
+                rows = connection.execute(old_jobs).mappings().all()
+                if not rows:
+                    break
+
+                if export_file:
+                    for row in rows:
+                        export_file.write(json.dumps(dict(row), default=str) + "\n")
+                    export_file.flush()
+                else:
+                    connection.execute(archive_insert(engine, archive_table), [
+                        {
+                            "id": row["id"],
+                            "message_id": row["message_id"],
+                            "channel_name": row["channel_name"],
+                            "message_text_zlib": zlib.compress(row["message_text"].encode("utf-8")),
+                            "posted_at": row["posted_at"],
+                            "created_at": row["created_at"],
+                            "archived_at": datetime.datetime.now(datetime.timezone.utc),
+                        }
+                        for row in rows
+                    ])
+                connection.execute(delete(jobs_table).where(jobs_table.c.id.in_([row["id"] for row in rows])))
+                connection.commit()
+                moved += len(rows)
+                logging.info(f"Archived {moved} job(s) so far.")
+    finally:
+        if export_file:
+            export_file.close()
+
+    destination = export_path or "jobs_archive"
+    logging.info(f"Retention complete. Moved {moved} job(s) posted before {cutoff:%Y-%m-%d} to {destination}.")
+    return moved
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archive jobs older than the retention window.")
+    parser.add_argument("--days", type=int, default=JOB_RETENTION_DAYS, help="keep jobs posted within this many days")
+    parser.add_argument("--export", metavar="PATH", help="append old jobs to this .jsonl.gz file instead of jobs_archive")
+    parser.add_argument("--dry-run", action="store_true", help="only report how many jobs would be moved")
+    args = parser.parse_args()
+
+    archive_old_jobs(create_engine(DATABASE_URL), args.days, args.export, args.dry_run)
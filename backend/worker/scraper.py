@@ -3,7 +3,9 @@ import logging
 import datetime
 from telethon.sync import TelegramClient
 from sqlalchemy import create_engine, Table, MetaData, select, insert
-from config import API_ID, API_HASH, DATABASE_URL, TARGET_CHANNEL
+from groq import AsyncGroq
+from config import API_ID, API_HASH, DATABASE_URL, GROQ_API_KEY, TARGET_CHANNEL, JOB_RETENTION_DAYS
+from matcher import score_new_jobs
 
 # --- Setup Logging ---
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -18,6 +20,7 @@ async def fetch_and_save_jobs():
     try:
         # --- Database Connection ---
         jobs_table = Table('jobs', metadata, autoload_with=engine)
+        archive_table = Table('jobs_archive', metadata, autoload_with=engine)
         logging.info("Successfully connected to database and found 'jobs' table.")
 
         # --- Telegram Connection ---
@@ -35,11 +38,18 @@ async def fetch_and_save_jobs():
         channel = await client.get_entity(TARGET_CHANNEL)
         
         new_jobs_count = 0
+        # Older posts belong in the archive; re-inserting them would undo retention.py.
+        retention_cutoff = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=JOB_RETENTION_DAYS)
         with engine.connect() as connection:
             async for message in client.iter_messages(channel, limit=100): # Increased limit
+                if message.date < retention_cutoff:
+                    break # Messages come newest first, so the rest are older too.
                 if message.text:
-                    # Check for duplicates
-                    select_stmt = select(jobs_table).where(jobs_table.c.message_id == message.id)
+                    # Check for duplicates, including jobs retention.py has already archived
+                    # (it may have run with a shorter --days than JOB_RETENTION_DAYS).
+                    select_stmt = select(jobs_table.c.message_id).where(jobs_table.c.message_id == message.id).union_all(
+                        select(archive_table.c.message_id).where(archive_table.c.message_id == message.id)
+                    )
                     result = connection.execute(select_stmt).first()
 
                     if result is None:
@@ -57,6 +67,12 @@ async def fetch_and_save_jobs():
         
         logging.info(f"Scraping complete. Found and saved {new_jobs_count} new job(s).")
 
+        # --- Background Matching ---
+        # Score the new jobs against every opted-in CV so /api/match-jobs is a plain read.
+        # This also rescores CVs changed since the last run, even when no new jobs arrived.
+        scored = await score_new_jobs(engine, AsyncGroq(api_key=GROQ_API_KEY))
+        logging.info(f"Background matching complete. Stored {scored} new match score(s).")
+
     except Exception as e:
         logging.error(f"An error occurred during the scraping process: {e}", exc_info=True)
     finally:
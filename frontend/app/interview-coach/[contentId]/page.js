@@ -1,6 +1,6 @@
 'use client';
 
-import { useEffect, useState } from 'react';
+import { useEffect, useRef, useState } from 'react';
 import { useAuth } from '@/context/AuthContext';
 import { useRouter, useParams } from 'next/navigation';
 import Navbar from '@/components/Navbar';
@@ -14,11 +14,14 @@ const InterviewCoachPage = () => {
 
     const [isLoading, setIsLoading] = useState(true);
     const [error, setError] = useState(null);
+    const [notice, setNotice] = useState(null);
     const [questions, setQuestions] = useState([]);
     const [activeQuestionIndex, setActiveQuestionIndex] = useState(null);
     const [userAnswers, setUserAnswers] = useState({});
     const [feedback, setFeedback] = useState({});
+    const [streamingFeedback, setStreamingFeedback] = useState({});
     const [isAnalyzing, setIsAnalyzing] = useState({});
+    const socketRef = useRef(null);
 
     const { isListening, transcript, startListening, stopListening, hasRecognitionSupport } = useSpeechRecognition();
 
@@ -29,51 +32,73 @@ const InterviewCoachPage = () => {
             router.push('/login');
             return;
         }
-
-        const fetchContentAndGenerateQuestions = async () => {
-            try {
-                const contentRes = await fetch(`${API_BASE_URL}/api/content/${contentId}`,
-                    {
-                        headers: { 'Authorization': `Bearer ${token}` }
-                    });
-                if (!contentRes.ok) throw new Error('Failed to fetch content.');
-                const contentData = await contentRes.json();
-
-                const { original_cv_text, original_job_description } = contentData;
-
-                if (!original_cv_text || !original_job_description) {
-                    throw new Error("Could not find the required information in this saved item.");
-                }
-
-                const questionsRes = await fetch(`${API_BASE_URL}/api/generate-interview-questions`,
-                    {
-                        method: 'POST',
-                        headers: {
-                            'Content-Type': 'application/json',
-                            'Authorization': `Bearer ${token}`
-                        },
-                        body: JSON.stringify({ cv_text: original_cv_text, job_description: original_job_description })
-                    });
-                if (!questionsRes.ok) throw new Error('Failed to generate questions.');
-                const questionsData = await questionsRes.json();
-                setQuestions(questionsData.questions || []);
-
-            } catch (err) {
-                setError(err.message);
-            } finally {
-                setIsLoading(false);
+        if (!contentId) return;
+
+        // One session per visit: questions and feedback stream over the same socket,
+        // and the server keeps the interview context between answers.
+        const socket = new WebSocket(`${API_BASE_URL.replace(/^http/, 'ws')}/ws/interview-coach/${contentId}`);
+        socketRef.current = socket;
+
+        // The token goes in the first frame rather than the URL, which would end up in server logs.
+        socket.onopen = () => socket.send(JSON.stringify({ type: 'auth', token }));
+
+        socket.onmessage = (event) => {
+            const message = JSON.parse(event.data);
+            switch (message.type) {
+                case 'question':
+                    setQuestions(prev => [...prev, message.text]);
+                    setIsLoading(false);
+                    break;
+                case 'questions_done':
+                    setIsLoading(false);
+                    break;
+                case 'feedback_delta':
+                    setStreamingFeedback(prev => ({ ...prev, [message.question_index]: (prev[message.question_index] || '') + message.delta }));
+                    break;
+                case 'feedback':
+                    setFeedback(prev => ({ ...prev, [message.question_index]: message.feedback }));
+                    setStreamingFeedback(prev => ({ ...prev, [message.question_index]: '' }));
+                    setIsAnalyzing(prev => ({ ...prev, [message.question_index]: false }));
+                    break;
+                case 'error':
+                    setNotice(message.retry_after ? `${message.detail} (try again in ${message.retry_after}s)` : message.detail);
+                    setIsAnalyzing({});
+                    setIsLoading(false);
+                    break;
+                default:
+                    break;
             }
         };
 
-        if (contentId) {
-            fetchContentAndGenerateQuestions();
-        }
+        socket.onclose = (event) => {
+            // 1008: rejected at connect; 1013: no questions could be generated (credit refunded).
+            if (event.code === 1008 || event.code === 1013) {
+                setError(event.reason || 'Could not start the interview session.');
+            } else {
+                setNotice(`The interview session has ended${event.reason ? ` (${event.reason})` : ''}. Reload the page to start a new one.`);
+            }
+            setIsAnalyzing({});
+            setIsLoading(false);
+        };
 
+        return () => {
+            socket.onclose = null;
+            socket.close();
+        };
     }, [contentId, isLoggedIn, router, token, API_BASE_URL]);
 
+    const sendMessage = (message) => {
+        if (socketRef.current && socketRef.current.readyState === WebSocket.OPEN) {
+            socketRef.current.send(JSON.stringify(message));
+            return true;
+        }
+        return false;
+    };
+
     useEffect(() => {
         if (transcript && activeQuestionIndex !== null) {
             setUserAnswers(prev => ({ ...prev, [activeQuestionIndex]: transcript }));
+            sendMessage({ type: 'answer_update', question_index: activeQuestionIndex, text: transcript });
         }
     }, [transcript, activeQuestionIndex]);
 
@@ -87,26 +112,15 @@ const InterviewCoachPage = () => {
         }
     };
 
-    const getFeedbackForAnswer = async (index, answer) => {
+    const getFeedbackForAnswer = (index, answer) => {
         if (!answer) return;
-        setIsAnalyzing(prev => ({ ...prev, [index]: true }));
-        try {
-            const res = await fetch(`${API_BASE_URL}/api/analyze-interview-answer`, {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                    'Authorization': `Bearer ${token}`
-                },
-                body: JSON.stringify({ question: questions[index], answer })
-            });
-            if (!res.ok) throw new Error('Failed to get feedback.');
-            const data = await res.json();
-            setFeedback(prev => ({ ...prev, [index]: data }));
-        } catch (err) {
-            setError(err.message);
-        } finally {
-            setIsAnalyzing(prev => ({ ...prev, [index]: false }));
+        if (!sendMessage({ type: 'answer_submit', question_index: index, text: answer })) {
+            setNotice('The interview session has ended. Reload the page to start a new one.');
+            return;
         }
+        setNotice(null);
+        setFeedback(prev => ({ ...prev, [index]: null }));
+        setIsAnalyzing(prev => ({ ...prev, [index]: true }));
     };
 
     return (
@@ -134,6 +148,9 @@ const InterviewCoachPage = () => {
                         </div>
                     ) : (
                         <div className="space-y-6">
+                            {notice && (
+                                <div className="text-center text-yellow-300 bg-yellow-900/20 p-3 rounded-lg">{notice}</div>
+                            )}
                             {questions.map((q, index) => (
                                 <div key={index} className="bg-gray-800 p-5 rounded-lg shadow-lg">
                                     <p className="text-lg font-semibold">
@@ -154,7 +171,11 @@ const InterviewCoachPage = () => {
                                             <p className="text-gray-300">{userAnswers[index]}</p>
                                         </div>
                                     )}
-                                    {isAnalyzing[index] && <p className="text-sm text-indigo-300 mt-2">Analyzing...</p>}
+                                    {isAnalyzing[index] && (
+                                        streamingFeedback[index]
+                                            ? <p className="text-sm text-indigo-200 mt-2 whitespace-pre-line">{streamingFeedback[index]}</p>
+                                            : <p className="text-sm text-indigo-300 mt-2">Analyzing...</p>
+                                    )}
                                     {feedback[index] && (
                                         <div className="mt-4 space-y-3 text-sm">
                                             <div className="p-3 bg-green-900/30 rounded-md border border-green-700">
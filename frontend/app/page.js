@@ -318,7 +318,7 @@ export default function Home() {
                 cv_text: extractedCvText,
                 job_description: jobDescription,
             });
-            if (data) setValuationResult(JSON.parse(data));
+            if (data) setValuationResult(data);
         } catch (err) {
             setError(err.message);
         } finally {